@@ -34,6 +34,18 @@ def _env_int(name: str, default: int) -> int:
         return default
 
 
+def _env_float(name: str, default: float) -> float:
+    """Parse env var as float, warning and falling back on invalid values."""
+    raw = _clean_env(os.getenv(name))
+    if not raw:
+        return default
+    try:
+        return float(raw)
+    except (ValueError, TypeError):
+        logger.warning("Invalid float for %s=%r; using default %s", name, raw, default)
+        return default
+
+
 def _env_bool(name: str, default: bool) -> bool:
     """Parse env bool flags."""
     raw = os.getenv(name)
@@ -79,6 +91,67 @@ class Settings:
 
     # Frontend GLiNER typing debounce (milliseconds), served via backend config endpoint.
     GLINER_DEBOUNCE_MS: int = _env_int("GLINER_DEBOUNCE_MS", 400)
+
+    # GLiNER inference backend: "torch" (default) or "onnx" (ONNX Runtime CPU;
+    # exported once and cached under HF_HOME, falls back to torch on span drift).
+    GLINER_BACKEND: str = (_clean_env(os.getenv("GLINER_BACKEND")) or "torch").lower()
+    # GLiNER precision: "fp32" (default), "int8" (dynamic quantization of linear
+    # layers) or "bf16" (CPU autocast, torch backend only). A startup self-check
+    # falls back to fp32 if probe-set span F1 drops below the agreement threshold.
+    GLINER_PRECISION: str = (_clean_env(os.getenv("GLINER_PRECISION")) or "fp32").lower()
+    GLINER_PRECISION_MIN_AGREEMENT: float = _env_float("GLINER_PRECISION_MIN_AGREEMENT", 0.95)
+
+    # GLiNER inference runs on dedicated worker threads; requests beyond the
+    # queue size are rejected with 503 + Retry-After instead of piling up.
+    GLINER_INFERENCE_WORKERS: int = _env_int("GLINER_INFERENCE_WORKERS", 1)
+    GLINER_INFERENCE_QUEUE_SIZE: int = _env_int("GLINER_INFERENCE_QUEUE_SIZE", 16)
+    GLINER_RETRY_AFTER_SECONDS: int = _env_int("GLINER_RETRY_AFTER_SECONDS", 1)
+    # Live-typing jobs may fill at most this share of the inference queue and
+    # are shed first when assessment/analyze work needs room.
+    GLINER_TYPING_QUEUE_SHARE: float = _env_float("GLINER_TYPING_QUEUE_SHARE", 0.5)
+    # GLINER_WORKER_PROCESSES > 0 runs forward passes in that many worker
+    # processes (one model each; "fork" shares the parent's weights
+    # copy-on-write). Forking a process with live torch/OpenMP threads can
+    # deadlock the child, so "fork" only forks once at startup from a
+    # single-threaded, un-warmed parent copy and restarts workers with
+    # "spawn". GLINER_WORKER_TORCH_THREADS=0 splits the CPUs evenly.
+    GLINER_WORKER_PROCESSES: int = _env_int("GLINER_WORKER_PROCESSES", 0)
+    GLINER_WORKER_START_METHOD: str = (_clean_env(os.getenv("GLINER_WORKER_START_METHOD")) or "spawn").lower()
+    GLINER_WORKER_TORCH_THREADS: int = _env_int("GLINER_WORKER_TORCH_THREADS", 0)
+    # A worker call unanswered after this many seconds fails and its worker is
+    # restarted (0 waits forever).
+    GLINER_WORKER_CALL_TIMEOUT_SECONDS: int = _env_int("GLINER_WORKER_CALL_TIMEOUT_SECONDS", 120)
+    # Concurrent /pii/detect calls are collected for up to GLINER_BATCH_WINDOW_MS
+    # (or GLINER_BATCH_MAX_SIZE texts) and run as one batched forward pass.
+    GLINER_BATCH_WINDOW_MS: int = _env_int("GLINER_BATCH_WINDOW_MS", 10)
+    GLINER_BATCH_MAX_SIZE: int = _env_int("GLINER_BATCH_MAX_SIZE", 8)
+    # Chunks of one long message are predicted together, this many per forward pass.
+    GLINER_CHUNK_BATCH_SIZE: int = _env_int("GLINER_CHUNK_BATCH_SIZE", 8)
+    # Prebuilt model artifact written at image build time (GliNERService.build_artifact);
+    # loaded memory-mapped instead of through the HF loaders. Empty disables it.
+    GLINER_ARTIFACT_DIR: str = _clean_env(os.getenv("GLINER_ARTIFACT_DIR")) or ""
+    # Run a warmup inference over representative input lengths right after loading.
+    GLINER_WARMUP: bool = _env_bool("GLINER_WARMUP", True)
+    # Unload the model after this many seconds without a request (0 keeps it
+    # loaded); /pii/status or the next detection request loads it again.
+    GLINER_IDLE_UNLOAD_SECONDS: int = _env_int("GLINER_IDLE_UNLOAD_SECONDS", 0)
+    # Optional small GLiNER checkpoint for live typing underlines ("small" tier);
+    # empty runs everything on GLINER_MODEL_NAME. It loads and warms up
+    # independently of the base model and always runs in-process.
+    GLINER_SMALL_MODEL_NAME: str = _clean_env(os.getenv("GLINER_SMALL_MODEL_NAME")) or ""
+    GLINER_SMALL_ARTIFACT_DIR: str = _clean_env(os.getenv("GLINER_SMALL_ARTIFACT_DIR")) or ""
+    # With a small tier, GLINER_CASCADE screens analyze/assessment detection with
+    # the small model at GLINER_CASCADE_THRESHOLD first; the base model only runs
+    # on texts with candidate spans (including low-confidence ones).
+    GLINER_CASCADE: bool = _env_bool("GLINER_CASCADE", False)
+    GLINER_CASCADE_THRESHOLD: float = _env_float("GLINER_CASCADE_THRESHOLD", 0.3)
+    # Masking results are cached by content hash. Entries hold raw PII span text,
+    # so they are dropped after GLINER_CACHE_TTL_SECONDS even if never read again.
+    # Set either value to 0 to disable the cache.
+    GLINER_CACHE_MAX_ENTRIES: int = _env_int("GLINER_CACHE_MAX_ENTRIES", 1024)
+    GLINER_CACHE_TTL_SECONDS: int = _env_int("GLINER_CACHE_TTL_SECONDS", 300)
+    # Upper bound on texts accepted by one /pii/detect-batch call.
+    GLINER_DETECT_BATCH_MAX_ITEMS: int = _env_int("GLINER_DETECT_BATCH_MAX_ITEMS", 64)
     
     # Server settings
     HOST: str = os.getenv("HOST", "0.0.0.0")
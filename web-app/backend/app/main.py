@@ -10,6 +10,13 @@ import threading
 from app.config import settings
 from app.database import init_db, get_table_info, get_db_dialect, is_db_configured, require_db
 from app.middleware.security import SecurityHeadersMiddleware
+from app.services.gliner_registry import (
+    TIER_SMALL,
+    get_gliner_registry,
+    lease_gliner_service,
+    small_tier_enabled,
+)
+from app.services.masked_history import get_masked_history_store
 from app.routers import (
     participants,
     risk_assessment,
@@ -69,11 +76,19 @@ async def startup_event():
         else:
             logger.warning("Database is not configured at startup; DB-backed endpoints will return 503.")
         
-        # Warm up GLiNER model in background
+        # Warm up GLiNER model in background; the small typing tier (if any)
+        # loads on its own thread so it is not queued behind the base model.
+        if small_tier_enabled():
+            get_gliner_registry(TIER_SMALL).load_in_background()
+
         def warm_pii_model():
             try:
-                pii.get_gliner_service()
-                logger.info("GLiNER model warmup completed")
+                with lease_gliner_service() as service:
+                    logger.info("GLiNER model warmup completed")
+                    get_masked_history_store().precompute(
+                        risk_assessment.load_annotated_conversations(),
+                        service,
+                    )
             except Exception as e:
                 logger.error(f"GLiNER warmup failed: {e}")
         threading.Thread(target=warm_pii_model, daemon=True).start()
@@ -87,6 +102,25 @@ async def healthz():
     return {"ok": True}
 
 
+@app.get("/readyz")
+async def readyz():
+    """
+    Readiness endpoint for load balancers.
+
+    Returns 503 until the GLiNER model has finished loading and warming up
+    (and after a failed load), so traffic stays on instances that can detect PII.
+    """
+    registry = get_gliner_registry()
+    state = registry.status()["state"]
+    if not registry.is_ready():
+        return JSONResponse(
+            status_code=503,
+            content={"ready": False, "state": state},
+            headers={"Retry-After": str(settings.GLINER_RETRY_AFTER_SECONDS)},
+        )
+    return {"ready": True, "state": state}
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
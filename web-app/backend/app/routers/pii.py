@@ -1,65 +1,75 @@
 """
 PII detection endpoint using GLiNER service.
 """
+import asyncio
+import json
 import logging
-import threading
-from fastapi import APIRouter, HTTPException, Request
-from pydantic import BaseModel, Field
-from typing import List, Optional
-import sys
-import os
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
+from typing import Any, Dict, List, Literal, Optional, Tuple
 from app.config import settings
+from app.routers.risk_assessment import get_conversation_history_from_json
+from app.services.gliner_registry import (
+    TIER_BASE,
+    TIER_SMALL,
+    get_gliner_registry,
+    lease_gliner_service,
+    small_tier_enabled,
+)
+# gliner_registry puts the backend root (gliner_service, pii_rules) on sys.path.
+from pii_rules import DETECTOR_FAST, DETECTOR_HYBRID, mask_with_rules, merge_rule_spans
+from app.services.masked_history import get_masked_history_store
+from app.services.pii_gazetteer import get_gazetteer_store
+from app.services.pii_batcher import get_pii_batcher
+from app.services.pii_cascade import cascade_stats, mask_batch_cascaded
+from app.services.pii_coalescer import coalesce_key, get_pii_coalescer
+from app.services.pii_executor import (
+    PRIORITY_ANALYZE,
+    PRIORITY_TYPING,
+    PiiQueueFullError,
+    PiiSupersededError,
+    get_pii_executor,
+)
 from app.utils import require_mobile_request
 
-# Import gliner_service from backend directory
-# The file is at web-app/backend/gliner_service.py
-# This router is at web-app/backend/app/routers/pii.py
-# So we need to go up two levels: ../../gliner_service.py
-backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
-if backend_dir not in sys.path:
-    sys.path.insert(0, backend_dir)
-from gliner_service import GliNERService
-
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/pii", tags=["pii"])
 
-# Global service instance (lazy loaded)
-_gliner_service: Optional[GliNERService] = None
-_warmup_in_progress = False
-
-
-def get_gliner_service() -> GliNERService:
-    """Get or initialize GLiNER service singleton."""
-    global _gliner_service
-    if _gliner_service is None:
-        _gliner_service = GliNERService()
-        _gliner_service.initialize()
-    return _gliner_service
-
-
-def _start_warmup_in_background() -> None:
-    """Ensure GLiNER warmup runs asynchronously without blocking requests."""
-    global _warmup_in_progress
-    if _warmup_in_progress:
-        return
-
-    def _warmup():
-        global _warmup_in_progress
-        try:
-            get_gliner_service()
-        except Exception as exc:
-            logger.warning("Background GLiNER warmup attempt failed: %s", exc)
-        finally:
-            _warmup_in_progress = False
-
-    _warmup_in_progress = True
-    threading.Thread(target=_warmup, daemon=True).start()
+# Comment line sent on idle /pii/events streams so proxies keep them open.
+_SSE_KEEPALIVE_SECONDS = 15.0
 
 
 class PiiDetectRequest(BaseModel):
     """PII detection request."""
     draft_text: str = Field(..., min_length=1)
+    # "incremental" re-detects only changed sentences; meant for live typing.
+    mode: Literal["full", "incremental"] = "full"
+    # Label profile: "typing" is a short label prompt for live underlining,
+    # "full" runs every label (final assessment).
+    profile: Literal["full", "typing"] = "full"
+    # "fast" returns regex/checksum spans only (no model call), "hybrid" merges
+    # them into the model spans, "model" is GLiNER alone.
+    detector: Literal["model", "fast", "hybrid"] = "model"
+    # Seed conversation the draft belongs to; in fast/hybrid mode entity strings
+    # already found in its masked history are matched in the draft too.
+    conversation_id: Optional[int] = None
+    # Participant session for latest-wins coalescing: a newer detect call with
+    # the same participant/session/mode/profile drops this one if still queued.
+    participant_id: Optional[str] = None
+    session_id: Optional[int] = None
+    # Inference lane: "analyze" (explicit analyze/send) runs ahead of "typing"
+    # (live underlining, shed first under load). Defaults to "typing" for
+    # incremental or typing-profile calls, otherwise "analyze".
+    purpose: Optional[Literal["typing", "analyze"]] = None
+
+    def priority(self) -> int:
+        if self.purpose is not None:
+            return PRIORITY_TYPING if self.purpose == "typing" else PRIORITY_ANALYZE
+        if self.mode == "incremental" or self.profile == "typing":
+            return PRIORITY_TYPING
+        return PRIORITY_ANALYZE
 
 
 class PiiSpan(BaseModel):
@@ -68,12 +78,150 @@ class PiiSpan(BaseModel):
     end: int
     label: str
     text: str
+    # Offsets of the span's [LABEL] tag in masked_text.
+    masked_start: Optional[int] = None
+    masked_end: Optional[int] = None
 
 
 class PiiDetectResponse(BaseModel):
     """PII detection response."""
     masked_text: str
     pii_spans: List[PiiSpan]
+    # True when a newer request from the same session replaced this one before
+    # it ran; masked_text and pii_spans are then empty and should be ignored.
+    superseded: bool = False
+
+
+class PiiDetectBatchRequest(BaseModel):
+    """Batched PII detection request; each text is masked independently."""
+    texts: List[str] = Field(..., min_length=1, max_length=settings.GLINER_DETECT_BATCH_MAX_ITEMS)
+    profile: Literal["full", "typing"] = "full"
+    # "fast" returns regex/checksum spans only (no model call), "hybrid" merges
+    # them into the model spans, "model" is GLiNER alone.
+    detector: Literal["model", "fast", "hybrid"] = "model"
+    # Seed conversation the texts belong to; in fast/hybrid mode entity strings
+    # already found in its masked history are matched in every text too.
+    conversation_id: Optional[int] = None
+
+
+class PiiDetectBatchResponse(BaseModel):
+    """Batched PII detection response, one item per input text in order."""
+    items: List[PiiDetectResponse]
+
+
+class MaskedHistoryMessage(BaseModel):
+    """One masked seed-conversation message with its message-local spans."""
+    id: str
+    name: Optional[str] = None
+    direction: str
+    text: str
+    pii_spans: List[PiiSpan]
+
+
+class MaskedHistoryResponse(BaseModel):
+    """Masked seed-conversation history."""
+    conversation_id: int
+    content_hash: str
+    messages: List[MaskedHistoryMessage]
+
+
+class PiiStreamRevision(BaseModel):
+    """One draft revision sent by the client over /pii/stream."""
+    revision: int
+    draft_text: str
+    mode: Literal["full", "incremental"] = "incremental"
+    profile: Literal["full", "typing"] = "typing"
+    detector: Literal["model", "fast", "hybrid"] = "hybrid"
+    conversation_id: Optional[int] = None
+
+
+def _to_span(span) -> PiiSpan:
+    return PiiSpan(
+        start=span.start,
+        end=span.end,
+        label=span.label,
+        text=span.text,
+        masked_start=span.masked_start,
+        masked_end=span.masked_end,
+    )
+
+
+def _to_response(result) -> PiiDetectResponse:
+    """Convert a MaskingResult into the API response model."""
+    return PiiDetectResponse(
+        masked_text=result.masked_text,
+        pii_spans=[_to_span(span) for span in result.pii_spans],
+    )
+
+
+def _tier_for(priority: int) -> str:
+    """Live typing runs on the small model tier; everything else on the base model."""
+    return TIER_SMALL if priority == PRIORITY_TYPING else TIER_BASE
+
+
+def _run_mask_batch(texts: List[str], profile: str):
+    """Batched inference job body; runs on a GLiNER executor thread."""
+    return mask_batch_cascaded(texts, profile=profile)
+
+
+def _run_mask_history(conversation_id: int, messages):
+    """Mask one seed conversation and remember it; runs on a GLiNER executor thread."""
+    with lease_gliner_service() as service:
+        return get_masked_history_store().compute(conversation_id, messages, service)
+
+
+def _gazetteer_entry(conversation_id: Optional[int]):
+    """The conversation's masked history entry, or None until it is masked."""
+    if conversation_id is None:
+        return None
+    messages = get_conversation_history_from_json(conversation_id)
+    return get_masked_history_store().get(conversation_id, messages) if messages else None
+
+
+def _gazetteer_entities(conversation_id: Optional[int], text: str):
+    """Matches from the conversation's gazetteer; empty until its history is masked."""
+    if conversation_id is None:
+        return []
+    return get_gazetteer_store().find(_gazetteer_entry(conversation_id), text)
+
+
+def _queue_full_exception(exc: PiiQueueFullError) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="PII detection is busy, please retry shortly.",
+        headers={"Retry-After": str(exc.retry_after_seconds)},
+    )
+
+
+async def _detect(
+    text: str,
+    mode: str,
+    profile: str,
+    detector: str,
+    conversation_id: Optional[int],
+    coalesce: Optional[str] = None,
+    priority: int = PRIORITY_ANALYZE,
+):
+    """
+    Shared detection path for /detect and /stream; returns a MaskingResult.
+
+    With a coalesce key, a newer call for the same key cancels this one while
+    it is still queued, and PiiSupersededError is raised.
+    """
+    if detector == DETECTOR_FAST:
+        return mask_with_rules(text, _gazetteer_entities(conversation_id, text))
+    future = get_pii_batcher().submit(text, profile, priority, _tier_for(priority), mode)
+    if coalesce is not None:
+        get_pii_coalescer().track(coalesce, future)
+    try:
+        result = await asyncio.wrap_future(future)
+    except asyncio.CancelledError:
+        if future.cancelled():
+            raise PiiSupersededError()
+        raise
+    if detector == DETECTOR_HYBRID:
+        result = merge_rule_spans(text, result, _gazetteer_entities(conversation_id, text))
+    return result
 
 
 @router.post("/detect", response_model=PiiDetectResponse)
@@ -84,45 +232,340 @@ async def detect_pii(http_request: Request, request: PiiDetectRequest):
     """
     require_mobile_request(http_request)
     try:
-        logger.info("PII detect request received (len=%s)", len(request.draft_text))
-        service = get_gliner_service()
-        logger.info("PII service ready, running mask_and_chunk")
-        result = service.mask_and_chunk(request.draft_text)
-        logger.info("PII detect complete (spans=%s)", len(result.pii_spans))
-        
-        # Convert PiiSpan dataclasses to Pydantic models
-        pii_spans = [
-            PiiSpan(
-                start=span.start,
-                end=span.end,
-                label=span.label,
-                text=span.text
-            )
-            for span in result.pii_spans
-        ]
-        
-        return PiiDetectResponse(
-            masked_text=result.masked_text,
-            pii_spans=pii_spans
+        logger.info(
+            "PII detect request received (len=%s, profile=%s, detector=%s)",
+            len(request.draft_text),
+            request.profile,
+            request.detector,
+        )
+        result = await _detect(
+            request.draft_text,
+            request.mode,
+            request.profile,
+            request.detector,
+            request.conversation_id,
+            coalesce_key(request.participant_id, request.session_id, request.mode, request.profile),
+            request.priority(),
         )
+        logger.info("PII detect complete (spans=%s)", len(result.pii_spans))
+        return _to_response(result)
+    except PiiSupersededError:
+        return PiiDetectResponse(masked_text="", pii_spans=[], superseded=True)
+    except PiiQueueFullError as exc:
+        raise _queue_full_exception(exc)
     except Exception as e:
         logger.error(f"PII detection failed: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"PII detection failed: {str(e)}")
 
 
+_SpanKey = Tuple[int, int, str]
+
+# Revisions received, detected and dropped unprocessed across all /pii/stream
+# sockets. Only touched from the event loop, so no lock is needed.
+_stream_stats = {"connections": 0, "revisions": 0, "processed": 0, "superseded": 0}
+
+
+def _carry_over_spans(text: str, sent: Dict[_SpanKey, object], spans) -> List[object]:
+    """
+    Add previously pushed spans that still cover the same text to a fast result,
+    so model-only spans (names) do not flicker off until the model push arrives.
+    """
+    merged = list(spans)
+    for span in sent.values():
+        if text[span.start:span.end] != span.text:
+            continue
+        if any(span.start < other.end and other.start < span.end for other in merged):
+            continue
+        merged.append(span)
+    return merged
+
+
+async def _push_span_delta(
+    websocket: WebSocket,
+    revision: PiiStreamRevision,
+    stage: str,
+    spans,
+    sent: Dict[_SpanKey, object],
+) -> Dict[_SpanKey, object]:
+    """Send the spans added/removed relative to the last push; return the new span set."""
+    current = {(span.start, span.end, span.label): span for span in spans}
+    await websocket.send_json(
+        {
+            "type": "spans",
+            "revision": revision.revision,
+            "stage": stage,
+            "added": [
+                _to_span(span).model_dump() for key, span in current.items() if key not in sent
+            ],
+            "removed": [
+                {"start": start, "end": end, "label": label}
+                for start, end, label in sent
+                if (start, end, label) not in current
+            ],
+            "span_count": len(current),
+        }
+    )
+    return current
+
+
+@router.websocket("/stream")
+async def pii_stream(websocket: WebSocket):
+    """
+    Stream draft revisions in and span deltas out over one connection.
+
+    The client sends PiiStreamRevision messages. Only the newest pending
+    revision is detected; revisions superseded while waiting are dropped
+    unprocessed. Each push is {"type": "spans", "revision", "stage", "added",
+    "removed", "span_count"}, relative to the spans last pushed on this socket.
+    Non-fast detectors get an immediate "fast" push (rules + gazetteer) before
+    the "model" push.
+    """
+    await websocket.accept()
+    _stream_stats["connections"] += 1
+    latest: Dict[str, Optional[PiiStreamRevision]] = {"revision": None}
+    pending = asyncio.Event()
+    send_lock = asyncio.Lock()
+
+    async def send(payload) -> None:
+        async with send_lock:
+            await websocket.send_json(payload)
+
+    async def receive_revisions() -> None:
+        while True:
+            payload = await websocket.receive_json()
+            try:
+                revision = PiiStreamRevision.model_validate(payload)
+            except ValidationError as exc:
+                await send({"type": "error", "revision": None, "detail": str(exc)})
+                continue
+            _stream_stats["revisions"] += 1
+            if pending.is_set():
+                _stream_stats["superseded"] += 1
+            latest["revision"] = revision
+            pending.set()
+
+    receiver = asyncio.create_task(receive_revisions())
+    waiter: Optional[asyncio.Task] = None
+    sent: Dict[_SpanKey, object] = {}
+    try:
+        while True:
+            waiter = asyncio.create_task(pending.wait())
+            done, _ = await asyncio.wait({receiver, waiter}, return_when=asyncio.FIRST_COMPLETED)
+            if receiver in done:
+                break
+            pending.clear()
+            revision = latest["revision"]
+            if not revision.draft_text.strip():
+                stages = [("model", DETECTOR_FAST)]
+            elif revision.detector == DETECTOR_FAST:
+                stages = [("fast", DETECTOR_FAST)]
+            else:
+                stages = [("fast", DETECTOR_FAST), ("model", revision.detector)]
+            for stage, detector in stages:
+                try:
+                    result = await _detect(
+                        revision.draft_text,
+                        revision.mode,
+                        revision.profile,
+                        detector,
+                        revision.conversation_id,
+                        priority=PRIORITY_TYPING,
+                    )
+                except PiiQueueFullError as exc:
+                    await send(
+                        {
+                            "type": "busy",
+                            "revision": revision.revision,
+                            "retry_after": exc.retry_after_seconds,
+                        }
+                    )
+                    break
+                except Exception as exc:
+                    logger.error("PII stream detection failed: %s", exc, exc_info=True)
+                    await send({"type": "error", "revision": revision.revision, "detail": str(exc)})
+                    break
+                # A newer revision arrived while this one ran: skip pushing stale spans.
+                if latest["revision"] is not revision:
+                    _stream_stats["superseded"] += 1
+                    break
+                spans = result.pii_spans
+                if stage == "fast" and len(stages) > 1:
+                    spans = _carry_over_spans(revision.draft_text, sent, spans)
+                async with send_lock:
+                    sent = await _push_span_delta(websocket, revision, stage, spans, sent)
+            else:
+                _stream_stats["processed"] += 1
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        if waiter is not None:
+            waiter.cancel()
+        receiver.cancel()
+        # Retrieve how the receiver ended so asyncio does not log it as unhandled.
+        if receiver.done() and not receiver.cancelled():
+            exc = receiver.exception()
+            if exc is not None and not isinstance(exc, WebSocketDisconnect):
+                logger.warning("PII stream receiver failed: %s", exc)
+        _stream_stats["connections"] -= 1
+
+
+@router.post("/detect-batch", response_model=PiiDetectBatchResponse)
+async def detect_pii_batch(http_request: Request, request: PiiDetectBatchRequest):
+    """
+    Detect PII in several texts at once (e.g. conversation history messages).
+    Span offsets are local to each item.
+    """
+    require_mobile_request(http_request)
+    try:
+        logger.info(
+            "PII batch detect request received (items=%s, detector=%s)",
+            len(request.texts),
+            request.detector,
+        )
+        entry = _gazetteer_entry(request.conversation_id)
+        gazetteer = get_gazetteer_store()
+        if request.detector == DETECTOR_FAST:
+            results = [mask_with_rules(text, gazetteer.find(entry, text)) for text in request.texts]
+        else:
+            results = await get_pii_executor().run(_run_mask_batch, request.texts, request.profile)
+            if request.detector == DETECTOR_HYBRID:
+                results = [
+                    merge_rule_spans(text, result, gazetteer.find(entry, text))
+                    for text, result in zip(request.texts, results)
+                ]
+        logger.info(
+            "PII batch detect complete (spans=%s)",
+            sum(len(result.pii_spans) for result in results),
+        )
+        return PiiDetectBatchResponse(items=[_to_response(result) for result in results])
+    except PiiQueueFullError as exc:
+        raise _queue_full_exception(exc)
+    except Exception as e:
+        logger.error(f"PII batch detection failed: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"PII batch detection failed: {str(e)}")
+
+
+@router.get("/masked-history/{conversation_id}", response_model=MaskedHistoryResponse)
+async def masked_history(http_request: Request, conversation_id: int):
+    """
+    Return the masked history of a seed conversation.
+    Served from the startup precompute; masked on demand if it is missing or stale.
+    """
+    require_mobile_request(http_request)
+    messages = get_conversation_history_from_json(conversation_id)
+    if not messages:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    entry = get_masked_history_store().get(conversation_id, messages)
+    if entry is None:
+        try:
+            entry = await get_pii_executor().run(_run_mask_history, conversation_id, messages)
+        except PiiQueueFullError as exc:
+            raise _queue_full_exception(exc)
+        except Exception as e:
+            logger.error(f"Masked history failed: {e}", exc_info=True)
+            raise HTTPException(status_code=500, detail=f"Masked history failed: {str(e)}")
+    return MaskedHistoryResponse(
+        conversation_id=entry.conversation_id,
+        content_hash=entry.content_hash,
+        messages=[
+            MaskedHistoryMessage(
+                id=message["id"],
+                name=message.get("name"),
+                direction=message["direction"],
+                text=message["text"],
+                pii_spans=[PiiSpan(**span) for span in spans],
+            )
+            for message, spans in zip(entry.messages, entry.pii_spans)
+        ],
+    )
+
+
 @router.get("/status")
 async def pii_status(request: Request):
     """Return whether the GLiNER model is loaded."""
     require_mobile_request(request)
+    registry = get_gliner_registry()
     try:
         # Non-blocking status check: do not trigger model initialization here.
-        service = _gliner_service
-        loaded = bool(service and service.is_loaded())
+        loaded = registry.is_loaded()
         if not loaded:
-            _start_warmup_in_background()
+            registry.load_in_background()
+        # The small tier warms up on its own so live underlines come online first.
+        get_gliner_registry(TIER_SMALL).load_in_background()
     except Exception:
         loaded = False
-    return {"loaded": loaded}
+    small = get_gliner_registry(TIER_SMALL).status() if small_tier_enabled() else None
+    return {"loaded": loaded, **registry.status(), "small_tier": small}
+
+
+def _sse_message(event: Dict[str, Any]) -> str:
+    return f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+
+
+@router.get("/events")
+async def pii_events(request: Request):
+    """
+    Stream GLiNER lifecycle events as Server-Sent Events.
+
+    The current state is sent first, then loading/progress/warm/unloaded/failed
+    events as they happen. Subscribing starts a model load if none is running.
+    """
+    require_mobile_request(request)
+    registry = get_gliner_registry()
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+
+    def listener(event: Dict[str, Any]) -> None:
+        try:
+            loop.call_soon_threadsafe(events.put_nowait, event)
+        except RuntimeError:
+            pass  # event loop already closed
+
+    # Subscribe before taking the snapshot so no transition is missed.
+    registry.add_listener(listener)
+    registry.load_in_background()
+
+    async def stream():
+        try:
+            yield _sse_message(registry.current_event())
+            while True:
+                try:
+                    event = await asyncio.wait_for(events.get(), timeout=_SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                yield _sse_message(event)
+        finally:
+            registry.remove_listener(listener)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/metrics")
+async def pii_metrics(request: Request):
+    """Return inference queue, micro-batching, result-cache, worker-pool and model lifecycle counters."""
+    require_mobile_request(request)
+    registry = get_gliner_registry()
+    service = registry.peek()
+    cache = service.cache if service is not None else None
+    pool = getattr(service, "pool", None)
+    return {
+        "executor": get_pii_executor().stats(),
+        "batcher": get_pii_batcher().stats(),
+        "cache": cache.stats() if cache is not None else None,
+        "worker_pool": pool.stats() if pool is not None else None,
+        "stream": dict(_stream_stats),
+        "coalescer": get_pii_coalescer().stats(),
+        "model": registry.lifecycle_stats(),
+        "small_model": get_gliner_registry(TIER_SMALL).lifecycle_stats() if small_tier_enabled() else None,
+        "cascade": cascade_stats(),
+    }
 
 
 @router.get("/config")
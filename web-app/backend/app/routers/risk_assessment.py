@@ -3,8 +3,6 @@ Risk assessment routes.
 """
 from fastapi import APIRouter, HTTPException, Request
 import logging
-import sys
-import os
 import json
 import threading
 from dataclasses import dataclass, field
@@ -23,24 +21,17 @@ from app.services.risk_assessment import RiskAssessmentService
 from app.config import settings
 from app.participant_state import sync_participant_completion_state
 from app.scenario_counters import allocate_llm_nth_call, release_llm_cap_slot, reserve_llm_cap_slot
+from app.services.pii_cascade import mask_and_chunk_cascaded
+from app.services.masked_history import get_masked_history_store
+from app.services.pii_executor import PRIORITY_ASSESSMENT, PiiQueueFullError, get_pii_executor
 from app.utils import get_singapore_time, require_mobile_request
 
-# Import gliner_service from backend directory
-# The file is at web-app/backend/gliner_service.py
-# This router is at web-app/backend/app/routers/risk_assessment.py
-# So we need to go up two levels: ../../gliner_service.py
-backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
-if backend_dir not in sys.path:
-    sys.path.insert(0, backend_dir)
-from gliner_service import GliNERService
-
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api", tags=["risk"])
 
 ABORT_MARKER = "[ABORT]"
 
-_gliner_service: Optional[GliNERService] = None
 _annotated_conversations: Optional[Dict[int, List[Dict[str, Any]]]] = None
 
 
@@ -284,15 +275,6 @@ def _resolve_output_id(payload: Dict[str, Any], fallback: Optional[str] = None)
     return value or None
 
 
-def get_gliner_service() -> GliNERService:
-    """Get or initialize GLiNER service singleton."""
-    global _gliner_service
-    if _gliner_service is None:
-        _gliner_service = GliNERService()
-        _gliner_service.initialize()
-    return _gliner_service
-
-
 def transform_messages(raw_messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
     Transform messages from {Name, Message} format to frontend-expected format.
@@ -497,8 +479,16 @@ def _process_risk_assessment_payload(request: Dict[str, Any]) -> Any:
     else:
         # Perform PII detection on backend
         try:
-            gliner = get_gliner_service()
-            pii_result = gliner.mask_and_chunk(draft_text)
+            try:
+                # Assessment detection runs in the most urgent inference lane,
+                # ahead of queued live-typing work.
+                pii_result = get_pii_executor().run_sync(
+                    mask_and_chunk_cascaded, draft_text, priority=PRIORITY_ASSESSMENT
+                )
+            except PiiQueueFullError:
+                # Never downgrade an assessment to "no PII" because of load.
+                logger.warning("[RISK] PII inference queue full; masking inline")
+                pii_result = mask_and_chunk_cascaded(draft_text)
             pii_detected = bool(pii_result.pii_spans)
             masked_text = pii_result.masked_text if pii_detected else None
             logger.info("[RISK] Backend PII detection: detected=%s, spans=%d, masked_len=%s", 
@@ -548,9 +538,13 @@ def _process_risk_assessment_payload(request: Dict[str, Any]) -> Any:
         db.close()
 
     # Get conversation history from conversation_history.json using conversation_id.
-    # Frontend can also provide masked_history to avoid remasking history repeatedly.
+    # Frontend can also provide masked_history to avoid remasking history repeatedly;
+    # otherwise fall back to the history precomputed at startup.
     conversation_history = get_conversation_history_from_json(conversation_id)
     masked_history = masked_history_input if masked_history_input else None
+    if masked_history is None:
+        precomputed = get_masked_history_store().get(conversation_id, conversation_history)
+        masked_history = precomputed.messages if precomputed is not None else None
     logger.info(
         "[RISK] Using conversation history (conv_id=%s, messages=%d, has_masked_history=%s)",
         conversation_id,
@@ -0,0 +1,418 @@
+"""
+Process-wide GLiNER model registry.
+
+Both the PII router and the risk router need the GLiNER model. The registry owns
+the single GliNERService instance (model + tokenizer) so the weights are loaded
+once per process, and serializes loading so concurrent first requests cannot
+start parallel GLiNER.from_pretrained calls.
+
+With GLINER_IDLE_UNLOAD_SECONDS > 0 a reaper thread unloads the model once no
+request has used it for that long; the next get() loads it again. Inference
+runs under lease(): the reaper never unloads a service that is leased, so a
+job cannot lose its model halfway through.
+
+There is one registry per model tier: "base" (GLINER_MODEL_NAME) serves
+analyze and assessment detection, and the optional "small" tier
+(GLINER_SMALL_MODEL_NAME) serves live typing underlines. Each tier loads,
+warms up and idles out on its own; without a small model the small tier is
+the base registry.
+
+Lifecycle changes are published to listeners as events: "loading", "progress"
+(with a stage), "warm" (loaded and warmed up), "unloaded" and "failed".
+"""
+import contextlib
+import ctypes
+import gc
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# Import gliner_service from backend directory
+# The file is at web-app/backend/gliner_service.py
+# This module is at web-app/backend/app/services/gliner_registry.py
+# So we need to go up two levels: ../../gliner_service.py
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+from gliner_service import GliNERService, LruTtlCache
+
+from app.config import settings
+from app.services.pii_executor import get_pii_executor
+
+logger = logging.getLogger(__name__)
+
+STATE_UNLOADED = "unloaded"
+STATE_LOADING = "loading"
+STATE_LOADED = "loaded"
+STATE_FAILED = "failed"
+
+TIER_BASE = "base"
+TIER_SMALL = "small"
+
+EVENT_LOADING = "loading"
+EVENT_PROGRESS = "progress"
+EVENT_WARM = "warm"
+EVENT_UNLOADED = "unloaded"
+EVENT_FAILED = "failed"
+
+# Event that describes each state to a subscriber that connects mid-lifecycle.
+_STATE_EVENTS = {
+    STATE_UNLOADED: EVENT_UNLOADED,
+    STATE_LOADING: EVENT_LOADING,
+    STATE_LOADED: EVENT_WARM,
+    STATE_FAILED: EVENT_FAILED,
+}
+
+
+def _rss_bytes(pid: Any = "self") -> Optional[int]:
+    """Resident set size of a process from /proc (None where unavailable)."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _service_rss_bytes(service: GliNERService) -> Optional[int]:
+    """RSS of this process plus any GLiNER worker processes the service runs."""
+    pool = getattr(service, "pool", None)
+    pids = ["self"]
+    if pool is not None:
+        pids += [worker["pid"] for worker in pool.stats()["workers"] if worker["pid"] is not None]
+    sizes = [_rss_bytes(pid) for pid in pids]
+    return None if sizes[0] is None else sum(size or 0 for size in sizes)
+
+
+def _release_freed_memory() -> None:
+    """Collect garbage and ask glibc to return freed heap pages to the OS."""
+    gc.collect()
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+class GlinerModelRegistry:
+    """Owns the shared GliNERService and tracks its load lifecycle."""
+
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        idle_unload_seconds: Optional[int] = None,
+        tier: str = TIER_BASE,
+    ):
+        self.model_name = model_name
+        self.tier = tier
+        self.idle_unload_seconds = (
+            idle_unload_seconds if idle_unload_seconds is not None else settings.GLINER_IDLE_UNLOAD_SECONDS
+        )
+        self._service: Optional[GliNERService] = None
+        self._load_lock = threading.Lock()
+        self._state = STATE_UNLOADED
+        self._load_started_at: Optional[float] = None
+        self._load_seconds: Optional[float] = None
+        self._last_error: Optional[str] = None
+        self._last_used = time.monotonic()
+        self._reaper: Optional[threading.Thread] = None
+        self._unloads = 0
+        self._last_unloaded_at: Optional[float] = None
+        self._last_unload_freed_bytes: Optional[int] = None
+        self._last_reload_seconds: Optional[float] = None
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._listeners_lock = threading.Lock()
+        self._background_lock = threading.Lock()
+        self._background_load: Optional[threading.Thread] = None
+        # Jobs currently holding the service through lease(); taken under
+        # _lease_lock, which unload_if_idle also holds while unloading.
+        self._leases = 0
+        self._lease_lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def lease(self, load: bool = True) -> Iterator[Optional[GliNERService]]:
+        """
+        Hold the loaded service for the duration of a job.
+
+        Loads the model first if needed; with load=False yields None instead
+        when it is not loaded. A leased service is never unloaded for idleness.
+        """
+        while True:
+            with self._lease_lock:
+                service = self.peek()
+                if service is not None:
+                    self._leases += 1
+                    self._last_used = time.monotonic()
+                    break
+            if not load:
+                yield None
+                return
+            self.get()
+        try:
+            yield service
+        finally:
+            with self._lease_lock:
+                self._leases -= 1
+            self._last_used = time.monotonic()
+
+    def get(self) -> GliNERService:
+        """
+        Return the loaded service, loading it first if needed (blocking).
+
+        The result is not protected from an idle unload; run inference under
+        lease() instead.
+        """
+        self._last_used = time.monotonic()
+        service = self.peek()
+        if service is not None:
+            return service
+
+        with self._load_lock:
+            service = self.peek()
+            if service is not None:
+                return service
+
+            service = self._service or self._create_service()
+            service.progress_callback = lambda stage: self._emit(EVENT_PROGRESS, stage=stage)
+            service.loader = self.get
+            self._service = service
+            self._state = STATE_LOADING
+            self._load_started_at = time.time()
+            self._emit(EVENT_LOADING)
+            started = time.perf_counter()
+            try:
+                service.initialize()
+            except Exception as exc:
+                self._state = STATE_FAILED
+                self._last_error = str(exc)
+                self._emit(EVENT_FAILED)
+                raise
+            self._load_seconds = time.perf_counter() - started
+            if self._unloads:
+                self._last_reload_seconds = self._load_seconds
+            self._last_error = None
+            self._state = STATE_LOADED
+            self._last_used = time.monotonic()
+            logger.info(
+                "GLiNER registry loaded %s in %.2fs",
+                service.model_name,
+                self._load_seconds,
+            )
+            self._emit(EVENT_WARM)
+            self._start_reaper()
+            return service
+
+    def load_in_background(self) -> bool:
+        """
+        Start loading the model on a background thread unless it is loaded or
+        a background load is already running. Returns True if a load started.
+        """
+        with self._background_lock:
+            if self.is_loaded():
+                return False
+            if self._background_load is not None and self._background_load.is_alive():
+                return False
+            self._background_load = threading.Thread(
+                target=self._load_quietly, name="gliner-background-load", daemon=True
+            )
+            self._background_load.start()
+            return True
+
+    def _load_quietly(self) -> None:
+        try:
+            self.get()
+        except Exception as exc:
+            logger.warning("Background GLiNER load failed: %s", exc)
+
+    def add_listener(self, listener: Callable[[Dict[str, Any]], None]) -> None:
+        """Subscribe to lifecycle events; listeners run on the emitting thread."""
+        with self._listeners_lock:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[Dict[str, Any]], None]) -> None:
+        with self._listeners_lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def current_event(self) -> Dict[str, Any]:
+        """The event describing the current state, for newly connected subscribers."""
+        return self._event(_STATE_EVENTS[self._state])
+
+    def _event(self, name: str, **extra: Any) -> Dict[str, Any]:
+        return {"event": name, "loaded": self.is_loaded(), **self.status(), **extra}
+
+    def _emit(self, name: str, **extra: Any) -> None:
+        event = self._event(name, **extra)
+        with self._listeners_lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(event)
+            except Exception:
+                logger.exception("GLiNER lifecycle listener failed")
+
+    def _start_reaper(self) -> None:
+        if self.idle_unload_seconds <= 0 or self._reaper is not None:
+            return
+        self._reaper = threading.Thread(target=self._reap_loop, name="gliner-idle-reaper", daemon=True)
+        self._reaper.start()
+
+    def _reap_loop(self) -> None:
+        interval = max(1.0, min(30.0, self.idle_unload_seconds / 4))
+        while True:
+            time.sleep(interval)
+            try:
+                self.unload_if_idle()
+            except Exception:
+                logger.exception("GLiNER idle unload failed")
+
+    def idle_seconds(self) -> float:
+        return time.monotonic() - self._last_used
+
+    def unload_if_idle(self) -> bool:
+        """
+        Unload the model if it has been idle for idle_unload_seconds.
+
+        Skipped while the service is leased or the inference executor has
+        queued or running jobs. Returns True if the model was unloaded.
+        """
+        if self.idle_unload_seconds <= 0 or self.idle_seconds() < self.idle_unload_seconds:
+            return False
+        executor_stats = get_pii_executor().stats()
+        if executor_stats["active"] or executor_stats["queued"]:
+            return False
+        with self._load_lock:
+            with self._lease_lock:
+                service = self._service
+                if service is None or not service.is_loaded() or self._leases:
+                    return False
+                if self.idle_seconds() < self.idle_unload_seconds:
+                    return False
+                rss_before = _service_rss_bytes(service)
+                service.cleanup()
+            _release_freed_memory()
+            rss_after = _service_rss_bytes(service)
+            self._state = STATE_UNLOADED
+            self._unloads += 1
+            self._last_unloaded_at = time.time()
+            self._last_unload_freed_bytes = (
+                rss_before - rss_after if rss_before is not None and rss_after is not None else None
+            )
+            self._emit(EVENT_UNLOADED)
+        logger.info(
+            "GLiNER model unloaded after %.0fs idle (freed=%s bytes)",
+            self.idle_seconds(),
+            self._last_unload_freed_bytes,
+        )
+        return True
+
+    def _create_service(self) -> GliNERService:
+        service_kwargs = {
+            "model_name": self.model_name,
+            "cache": LruTtlCache(
+                max_entries=settings.GLINER_CACHE_MAX_ENTRIES,
+                ttl_seconds=settings.GLINER_CACHE_TTL_SECONDS,
+            ),
+            "backend": settings.GLINER_BACKEND,
+            "precision": settings.GLINER_PRECISION,
+            "min_precision_agreement": settings.GLINER_PRECISION_MIN_AGREEMENT,
+            "chunk_batch_size": settings.GLINER_CHUNK_BATCH_SIZE,
+            "artifact_dir": settings.GLINER_ARTIFACT_DIR,
+            "warmup": settings.GLINER_WARMUP,
+        }
+        if self.tier == TIER_SMALL:
+            service_kwargs["artifact_dir"] = settings.GLINER_SMALL_ARTIFACT_DIR
+            return GliNERService(**service_kwargs)
+        if settings.GLINER_WORKER_PROCESSES > 0:
+            from app.services.pii_worker_pool import ProcessPoolGliNERService
+
+            return ProcessPoolGliNERService(
+                processes=settings.GLINER_WORKER_PROCESSES,
+                start_method=settings.GLINER_WORKER_START_METHOD,
+                torch_threads=settings.GLINER_WORKER_TORCH_THREADS,
+                call_timeout=settings.GLINER_WORKER_CALL_TIMEOUT_SECONDS,
+                **service_kwargs,
+            )
+        return GliNERService(**service_kwargs)
+
+    def peek(self) -> Optional[GliNERService]:
+        """
+        Return the service only if it is loaded and warmed up; never triggers loading.
+
+        GliNERService.is_loaded() turns true before initialize() runs the
+        warmup, so the registry state decides: it only becomes "loaded" once
+        initialize() has returned.
+        """
+        service = self._service
+        if self._state == STATE_LOADED and service is not None and service.is_loaded():
+            return service
+        return None
+
+    def is_loaded(self) -> bool:
+        return self.peek() is not None
+
+    def is_ready(self) -> bool:
+        """
+        Whether the instance should receive traffic: the model is loaded, or it
+        was unloaded for idleness and reloads on demand. False before the first
+        load completes, while (re)loading and after a failed load.
+        """
+        return self.is_loaded() or (self._state == STATE_UNLOADED and self._unloads > 0)
+
+    def status(self) -> Dict[str, Any]:
+        """Report load state and duration for status endpoints."""
+        service = self._service
+        return {
+            "tier": self.tier,
+            "state": self._state,
+            "model_name": service.model_name if service is not None else self.model_name,
+            "backend": service.active_backend if service is not None else None,
+            "precision": service.active_precision if service is not None else None,
+            "bi_encoder": service.bi_encoder if service is not None and service.is_loaded() else None,
+            "load_started_at": self._load_started_at,
+            "load_seconds": self._load_seconds,
+            "startup": service.startup_timings if service is not None else {},
+            "error": self._last_error,
+            "worker_processes": settings.GLINER_WORKER_PROCESSES if self.tier == TIER_BASE else 0,
+        }
+
+    def lifecycle_stats(self) -> Dict[str, Any]:
+        """Idle-unload counters: memory freed by the last unload and reload latency."""
+        service = self._service
+        return {
+            "state": self._state,
+            "idle_unload_seconds": self.idle_unload_seconds,
+            "idle_seconds": round(self.idle_seconds(), 1),
+            "leases": self._leases,
+            "unloads": self._unloads,
+            "last_unloaded_at": self._last_unloaded_at,
+            "last_unload_freed_bytes": self._last_unload_freed_bytes,
+            "last_reload_seconds": self._last_reload_seconds,
+            "rss_bytes": _service_rss_bytes(service) if service is not None else _rss_bytes(),
+        }
+
+
+_registry = GlinerModelRegistry()
+_small_registry = (
+    GlinerModelRegistry(settings.GLINER_SMALL_MODEL_NAME, tier=TIER_SMALL)
+    if settings.GLINER_SMALL_MODEL_NAME
+    else None
+)
+
+
+def small_tier_enabled() -> bool:
+    """Whether a separate small model is configured for the small tier."""
+    return _small_registry is not None
+
+
+def get_gliner_registry(tier: str = TIER_BASE) -> GlinerModelRegistry:
+    """Return the process-wide GLiNER registry for a tier."""
+    if tier == TIER_SMALL and _small_registry is not None:
+        return _small_registry
+    return _registry
+
+
+def lease_gliner_service(tier: str = TIER_BASE, load: bool = True):
+    """Lease the shared GLiNER service for a tier (see GlinerModelRegistry.lease)."""
+    return get_gliner_registry(tier).lease(load)
@@ -0,0 +1,101 @@
+"""
+Precomputed masked history for the static seed conversations.
+
+The seed conversations in conversation_history.json never change while the
+process runs, yet every Group A participant needs the same masked history. Each
+conversation is masked once, per message, and kept in memory keyed by
+conversation id and a hash of its message texts, so a reloaded or edited file
+is never served stale results.
+"""
+import hashlib
+import json
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class MaskedConversation:
+    """Masked messages (same shape as the seed messages) plus per-message spans."""
+    conversation_id: int
+    content_hash: str
+    messages: List[Dict[str, Any]]
+    pii_spans: List[List[Dict[str, Any]]]
+
+
+def conversation_content_hash(messages: List[Dict[str, Any]]) -> str:
+    """Hash the message texts that masking depends on."""
+    texts = [str(message.get("text") or "") for message in messages]
+    return hashlib.sha256(json.dumps(texts, ensure_ascii=True).encode("utf-8")).hexdigest()
+
+
+class MaskedHistoryStore:
+    """In-memory masked seed history keyed by conversation id and content hash."""
+
+    def __init__(self):
+        self._entries: Dict[int, MaskedConversation] = {}
+        self._lock = threading.Lock()
+
+    def get(self, conversation_id: int, messages: List[Dict[str, Any]]) -> Optional[MaskedConversation]:
+        """Return the stored entry if it was computed from these exact messages."""
+        with self._lock:
+            entry = self._entries.get(conversation_id)
+        if entry is None or entry.content_hash != conversation_content_hash(messages):
+            return None
+        return entry
+
+    def compute(self, conversation_id: int, messages: List[Dict[str, Any]], service) -> MaskedConversation:
+        """Mask every message in one batched call and store the result."""
+        results = service.mask_batch([str(message.get("text") or "") for message in messages])
+        entry = MaskedConversation(
+            conversation_id=conversation_id,
+            content_hash=conversation_content_hash(messages),
+            messages=[
+                {**message, "text": result.masked_text}
+                for message, result in zip(messages, results)
+            ],
+            pii_spans=[
+                [
+                    {
+                        "start": span.start,
+                        "end": span.end,
+                        "label": span.label,
+                        "text": span.text,
+                        "masked_start": span.masked_start,
+                        "masked_end": span.masked_end,
+                    }
+                    for span in result.pii_spans
+                ]
+                for result in results
+            ],
+        )
+        with self._lock:
+            self._entries[conversation_id] = entry
+        return entry
+
+    def precompute(self, conversations: Dict[int, List[Dict[str, Any]]], service) -> None:
+        """Mask all seed conversations; called once after the model loads."""
+        for conversation_id, messages in conversations.items():
+            if self.get(conversation_id, messages) is not None:
+                continue
+            try:
+                self.compute(conversation_id, messages, service)
+            except Exception as exc:
+                logger.error("Failed to precompute masked history for %s: %s", conversation_id, exc)
+                continue
+            logger.info(
+                "Precomputed masked history (conversation_id=%s, messages=%d)",
+                conversation_id,
+                len(messages),
+            )
+
+
+_store = MaskedHistoryStore()
+
+
+def get_masked_history_store() -> MaskedHistoryStore:
+    """Return the process-wide masked history store."""
+    return _store
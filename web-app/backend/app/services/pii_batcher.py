@@ -0,0 +1,278 @@
+"""
+Dynamic micro-batching for single-text PII detection.
+
+Concurrent /pii/detect calls from different participants are collected for a
+short window (or until the batch is full), grouped by label profile and token
+length so padding stays small, and run through GliNERService.mask_batch as one
+forward pass per group. Each caller receives its own MaskingResult.
+Base-tier groups go through the small/base cascade when it is enabled.
+
+Incremental (live typing) drafts are batched too: each draft is split into
+sentences, and the sentence windows that missed the cache, across every draft
+in the group, run as one batched prediction.
+"""
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from app.config import settings
+from app.services.gliner_registry import TIER_BASE, TIER_SMALL, get_gliner_registry, lease_gliner_service
+from app.services.pii_cascade import mask_batch_cascaded
+# gliner_registry puts the backend root on sys.path.
+from gliner_service import PROFILE_FULL
+from app.services.pii_executor import (
+    PRIORITY_ANALYZE,
+    PiiInferenceExecutor,
+    PiiQueueFullError,
+    get_pii_executor,
+)
+
+logger = logging.getLogger(__name__)
+
+# A group is closed once the next (sorted) text is more than this many times
+# longer than the group's shortest text, plus a small absolute slack.
+_MAX_LENGTH_RATIO = 2.0
+_LENGTH_SLACK_TOKENS = 16
+
+MODE_FULL = "full"
+MODE_INCREMENTAL = "incremental"
+
+
+@dataclass
+class _PendingDetect:
+    text: str
+    profile: str
+    priority: int = PRIORITY_ANALYZE
+    tier: str = TIER_BASE
+    mode: str = MODE_FULL
+    future: Future = field(default_factory=Future)
+    token_count: int = 0
+
+
+class PiiMicroBatcher:
+    """Collect concurrent detections into batched GLiNER calls."""
+
+    def __init__(
+        self,
+        executor: PiiInferenceExecutor,
+        window_ms: int,
+        max_batch_size: int,
+        max_pending: int,
+    ):
+        self._executor = executor
+        self.window_seconds = max(0, int(window_ms)) / 1000.0
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_pending = max(self.max_batch_size, int(max_pending))
+        self._pending: List[_PendingDetect] = []
+        self._condition = threading.Condition()
+        self._batches = 0
+        self._batched_items = 0
+        self._thread = threading.Thread(
+            target=self._collect_loop,
+            name="gliner-batcher",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def submit(
+        self,
+        text: str,
+        profile: str = PROFILE_FULL,
+        priority: int = PRIORITY_ANALYZE,
+        tier: str = TIER_BASE,
+        mode: str = MODE_FULL,
+    ) -> Future:
+        """Queue one text for the next batch; raises PiiQueueFullError when saturated."""
+        item = _PendingDetect(text=text, profile=profile, priority=priority, tier=tier, mode=mode)
+        # Cache hits skip the batching window entirely; a miss is counted once,
+        # later, by mask_batch. Incremental drafts are cached per sentence instead.
+        service = get_gliner_registry(tier).peek()
+        cached = (
+            service.lookup_cached(text, record_miss=False, profile=profile)
+            if service is not None and mode == MODE_FULL
+            else None
+        )
+        if cached is not None:
+            item.future.set_result(cached)
+            return item.future
+        with self._condition:
+            if len(self._pending) >= self.max_pending:
+                raise PiiQueueFullError(self._executor.retry_after_seconds)
+            self._pending.append(item)
+            self._condition.notify()
+        return item.future
+
+    async def detect(
+        self,
+        text: str,
+        profile: str = PROFILE_FULL,
+        priority: int = PRIORITY_ANALYZE,
+        tier: str = TIER_BASE,
+        mode: str = MODE_FULL,
+    ):
+        """Await the MaskingResult for one text."""
+        return await asyncio.wrap_future(self.submit(text, profile, priority, tier, mode))
+
+    def stats(self):
+        with self._condition:
+            return {
+                "pending": len(self._pending),
+                "batches": self._batches,
+                "batched_items": self._batched_items,
+                "window_ms": int(self.window_seconds * 1000),
+                "max_batch_size": self.max_batch_size,
+            }
+
+    def _collect_loop(self) -> None:
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                deadline = time.monotonic() + self.window_seconds
+                while len(self._pending) < self.max_batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                batch = self._pending[:self.max_batch_size]
+                del self._pending[:self.max_batch_size]
+            try:
+                self._dispatch(batch)
+            except Exception as exc:
+                logger.error("[PII] Micro-batch dispatch failed: %s", exc, exc_info=True)
+                for item in batch:
+                    if not item.future.done():
+                        item.future.set_exception(exc)
+
+    def _dispatch(self, batch: List[_PendingDetect]) -> None:
+        # Detections superseded while waiting for the window never reach the model.
+        batch = [item for item in batch if not item.future.cancelled()]
+        if not batch:
+            return
+        with lease_gliner_service(load=False) as service:
+            for item in batch:
+                item.token_count = (
+                    service.count_tokens(item.text) if service is not None else len(item.text.split())
+                )
+
+        # Texts detected with different label profiles, model tiers or modes
+        # cannot share a forward pass, and each group is queued in its callers'
+        # priority lane. Incremental drafts are predicted as short sentence
+        # windows, so their draft length says nothing about padding.
+        by_lane = {}
+        for item in batch:
+            by_lane.setdefault((item.profile, item.priority, item.tier, item.mode), []).append(item)
+        groups = [
+            group
+            for lane_items in by_lane.values()
+            for group in (
+                [lane_items] if lane_items[0].mode == MODE_INCREMENTAL else self._group_by_length(lane_items)
+            )
+        ]
+        for group in groups:
+            try:
+                job = self._executor.submit(self._run_group, group, priority=group[0].priority)
+            except PiiQueueFullError as exc:
+                self._fail_group(group, exc)
+                continue
+            # _run_group settles its callers itself; a job future that fails
+            # without running it (a typing job shed for urgent work) must not
+            # leave them waiting.
+            job.add_done_callback(
+                lambda done, group=group: None if done.cancelled() or done.exception() is None
+                else self._fail_group(group, done.exception())
+            )
+
+    @staticmethod
+    def _fail_group(group: List[_PendingDetect], exc: BaseException) -> None:
+        for item in group:
+            try:
+                if not item.future.done():
+                    item.future.set_exception(exc)
+            except InvalidStateError:
+                pass  # cancelled by a newer detection in the meantime
+
+    def _group_by_length(self, batch: List[_PendingDetect]) -> List[List[_PendingDetect]]:
+        """Split a batch into groups of similar token length to limit padding."""
+        groups: List[List[_PendingDetect]] = []
+        current: List[_PendingDetect] = []
+        for item in sorted(batch, key=lambda pending: pending.token_count):
+            if current:
+                shortest = current[0].token_count
+                if item.token_count > shortest * _MAX_LENGTH_RATIO + _LENGTH_SLACK_TOKENS:
+                    groups.append(current)
+                    current = []
+            current.append(item)
+        if current:
+            groups.append(current)
+        return groups
+
+    def _run_group(self, group: List[_PendingDetect]) -> None:
+        """Executor job: one batched forward pass, fanned out to each caller."""
+        # Marking futures running makes later cancellation fail, so a caller
+        # either gets a result or was superseded before the model call.
+        group = [item for item in group if item.future.set_running_or_notify_cancel()]
+        if not group:
+            return
+        texts = [item.text for item in group]
+        try:
+            with lease_gliner_service(group[0].tier) as service:
+                if group[0].mode == MODE_INCREMENTAL and service.incremental_available:
+                    results = self._run_incremental(service, group)
+                elif group[0].tier == TIER_SMALL:
+                    results = service.mask_batch(texts, profile=group[0].profile)
+                else:
+                    results = mask_batch_cascaded(texts, profile=group[0].profile)
+        except Exception as exc:
+            for item in group:
+                item.future.set_exception(exc)
+            return
+        with self._condition:
+            self._batches += 1
+            self._batched_items += len(group)
+        logger.info(
+            "[PII] Micro-batch complete (size=%d, profile=%s, tier=%s, mode=%s)",
+            len(group),
+            group[0].profile,
+            group[0].tier,
+            group[0].mode,
+        )
+        for item, result in zip(group, results):
+            item.future.set_result(result)
+
+    def _run_incremental(self, service, group: List[_PendingDetect]):
+        """Incremental masking for a group of drafts with one batched prediction of their windows."""
+        profile = group[0].profile
+        plans = [service.plan_incremental(item.text, profile) for item in group]
+        windows = [text for plan in plans for text in plan.window_texts]
+        entities = service.predict_entities(windows, profile) if windows else []
+        results = []
+        offset = 0
+        for plan in plans:
+            count = len(plan.pending_windows)
+            results.append(service.complete_incremental(plan, entities[offset:offset + count]))
+            offset += count
+        return results
+
+
+_batcher: Optional[PiiMicroBatcher] = None
+_batcher_lock = threading.Lock()
+
+
+def get_pii_batcher() -> PiiMicroBatcher:
+    """Get or create the process-wide micro-batcher."""
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                _batcher = PiiMicroBatcher(
+                    executor=get_pii_executor(),
+                    window_ms=settings.GLINER_BATCH_WINDOW_MS,
+                    max_batch_size=settings.GLINER_BATCH_MAX_SIZE,
+                    max_pending=settings.GLINER_INFERENCE_QUEUE_SIZE * settings.GLINER_BATCH_MAX_SIZE,
+                )
+    return _batcher
@@ -0,0 +1,97 @@
+"""
+Small/base GLiNER cascade for analyze and assessment detection.
+
+With GLINER_CASCADE on and a small tier configured, texts are first screened
+by the small model at GLINER_CASCADE_THRESHOLD, below the usual 0.5 cut-off.
+A text where the small model finds nothing, not even a low-confidence
+candidate, is returned unmasked without a base-model call; every other text
+runs on the base model as before. Base-model cache hits skip the screen.
+"""
+import logging
+import threading
+from typing import Dict, List, Optional
+
+from app.config import settings
+from app.services.gliner_registry import TIER_SMALL, lease_gliner_service, small_tier_enabled
+# gliner_registry puts the backend root on sys.path.
+from gliner_service import PROFILE_FULL, MaskingResult
+
+logger = logging.getLogger(__name__)
+
+_stats = {"screened": 0, "escalated": 0, "skipped": 0}
+_stats_lock = threading.Lock()
+
+
+def cascade_enabled() -> bool:
+    return settings.GLINER_CASCADE and small_tier_enabled()
+
+
+def mask_batch_cascaded(
+    texts: List[str],
+    max_tokens: int = 512,
+    profile: str = PROFILE_FULL,
+) -> List[MaskingResult]:
+    """GliNERService.mask_batch on the base tier, behind the small-model screen."""
+    with lease_gliner_service() as base:
+        if not cascade_enabled():
+            return base.mask_batch(texts, max_tokens, profile)
+        return _mask_batch_screened(base, texts, max_tokens, profile)
+
+
+def _mask_batch_screened(
+    base,
+    texts: List[str],
+    max_tokens: int,
+    profile: str,
+) -> List[MaskingResult]:
+
+    results: List[Optional[MaskingResult]] = [None] * len(texts)
+    pending: List[int] = []
+    for index, text in enumerate(texts):
+        cached = base.lookup_cached(text, max_tokens, record_miss=False, profile=profile)
+        if cached is not None:
+            results[index] = cached
+        else:
+            pending.append(index)
+    if not pending:
+        return results
+
+    with lease_gliner_service(TIER_SMALL) as small:
+        flags = small.screen_candidates(
+            [texts[index] for index in pending],
+            settings.GLINER_CASCADE_THRESHOLD,
+            max_tokens,
+            profile,
+        )
+    escalated = [index for index, flag in zip(pending, flags) if flag]
+    for index, flag in zip(pending, flags):
+        if not flag:
+            results[index] = base.unmasked_result(texts[index], max_tokens)
+    if escalated:
+        masked = base.mask_batch([texts[index] for index in escalated], max_tokens, profile)
+        for index, result in zip(escalated, masked):
+            results[index] = result
+
+    with _stats_lock:
+        _stats["screened"] += len(pending)
+        _stats["escalated"] += len(escalated)
+        _stats["skipped"] += len(pending) - len(escalated)
+    logger.info("[PII] Cascade screened %d texts, escalated %d to base", len(pending), len(escalated))
+    return results
+
+
+def mask_and_chunk_cascaded(
+    text: str,
+    max_tokens: int = 512,
+    profile: str = PROFILE_FULL,
+) -> MaskingResult:
+    """GliNERService.mask_and_chunk on the base tier, behind the small-model screen."""
+    if not cascade_enabled():
+        with lease_gliner_service() as service:
+            return service.mask_and_chunk(text, max_tokens, profile=profile)
+    return mask_batch_cascaded([text], max_tokens, profile)[0]
+
+
+def cascade_stats() -> Dict[str, object]:
+    with _stats_lock:
+        return {"enabled": cascade_enabled(), "threshold": settings.GLINER_CASCADE_THRESHOLD, **_stats}
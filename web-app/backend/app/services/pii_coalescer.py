@@ -0,0 +1,65 @@
+"""
+Latest-wins coalescing for /pii/detect.
+
+A participant's debounce can fire several detections in quick succession, and
+the client only keeps the newest answer. Each participant session (and
+mode/profile) keeps a handle on its newest queued detection; when a newer one
+arrives, the older one is cancelled while it is still waiting in the batcher or
+executor queue, so it never reaches the model. Detections already running are
+left to finish.
+"""
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def coalesce_key(
+    participant_id: Optional[str],
+    session_id: Optional[int],
+    mode: str,
+    profile: str,
+) -> Optional[str]:
+    """Coalescing key for a detect call, or None when the caller is anonymous."""
+    if not participant_id:
+        return None
+    return f"{participant_id}:{session_id or 1}:{mode}:{profile}"
+
+
+class PiiDetectCoalescer:
+    """Tracks the newest pending detection per key and cancels the ones it replaces."""
+
+    def __init__(self):
+        self._latest: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._superseded = 0
+
+    def track(self, key: str, future: Future) -> None:
+        """Make future the newest detection for key, cancelling the previous one if still queued."""
+        with self._lock:
+            previous = self._latest.get(key)
+            self._latest[key] = future
+        if previous is not None and previous is not future and previous.cancel():
+            with self._lock:
+                self._superseded += 1
+            logger.info("[PII] Dropped superseded detection (key=%s)", key)
+        future.add_done_callback(lambda done: self._forget(key, done))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"tracked": len(self._latest), "superseded": self._superseded}
+
+    def _forget(self, key: str, future: Future) -> None:
+        with self._lock:
+            if self._latest.get(key) is future:
+                del self._latest[key]
+
+
+_coalescer = PiiDetectCoalescer()
+
+
+def get_pii_coalescer() -> PiiDetectCoalescer:
+    """Return the process-wide detect coalescer."""
+    return _coalescer
@@ -0,0 +1,202 @@
+"""
+Bounded executor for GLiNER inference.
+
+Model calls are CPU-bound and block for the whole forward pass, so they must not
+run on the event loop. Jobs are handed to a small pool of dedicated worker
+threads through a bounded queue; once the queue is full new jobs are rejected
+with PiiQueueFullError so callers can shed load instead of queueing forever.
+
+The queue has priority lanes. Workers always take the most urgent lane first
+(risk assessment, then explicit analyze, then live typing). Typing jobs may
+only fill part of the queue, and when the queue is full a more urgent job
+evicts the newest queued typing job instead of being rejected.
+"""
+import asyncio
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Lower value = more urgent.
+PRIORITY_ASSESSMENT = 0
+PRIORITY_ANALYZE = 1
+PRIORITY_TYPING = 2
+
+PRIORITY_NAMES = {
+    PRIORITY_ASSESSMENT: "assessment",
+    PRIORITY_ANALYZE: "analyze",
+    PRIORITY_TYPING: "typing",
+}
+
+
+class PiiQueueFullError(RuntimeError):
+    """Raised when the inference queue cannot accept another job."""
+
+    def __init__(self, retry_after_seconds: int):
+        super().__init__("PII inference queue is full")
+        self.retry_after_seconds = retry_after_seconds
+
+
+class PiiSupersededError(RuntimeError):
+    """Raised when a queued detection was dropped because a newer one replaced it."""
+
+    def __init__(self):
+        super().__init__("PII detection superseded by a newer request")
+
+
+@dataclass
+class _InferenceJob:
+    fn: Callable[..., Any]
+    args: Tuple[Any, ...]
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+    future: Future = field(default_factory=Future)
+    priority: int = PRIORITY_ANALYZE
+
+
+class PiiInferenceExecutor:
+    """Fixed-size worker pool with a bounded, priority-laned job queue."""
+
+    def __init__(
+        self,
+        max_workers: int,
+        max_queue: int,
+        retry_after_seconds: int = 1,
+        typing_queue_share: float = 0.5,
+    ):
+        self.max_workers = max(1, int(max_workers))
+        self.max_queue = max(1, int(max_queue))
+        self.retry_after_seconds = max(1, int(retry_after_seconds))
+        self.max_typing_queued = max(1, int(self.max_queue * typing_queue_share))
+        self._lanes: Dict[int, Deque[_InferenceJob]] = {priority: deque() for priority in PRIORITY_NAMES}
+        self._condition = threading.Condition()
+        self._active = 0
+        self._rejected = 0
+        self._shed = 0
+        self._workers = [
+            threading.Thread(
+                target=self._worker,
+                name=f"gliner-inference-{index}",
+                daemon=True,
+            )
+            for index in range(self.max_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        priority: int = PRIORITY_ANALYZE,
+        **kwargs: Any,
+    ) -> Future:
+        """Queue a job in a priority lane, raising PiiQueueFullError when it cannot be admitted."""
+        job = _InferenceJob(fn=fn, args=args, kwargs=kwargs, priority=priority)
+        shed: Optional[_InferenceJob] = None
+        with self._condition:
+            queued = self._queued_locked()
+            typing_full = (
+                priority == PRIORITY_TYPING
+                and len(self._lanes[PRIORITY_TYPING]) >= self.max_typing_queued
+            )
+            if queued >= self.max_queue and priority < PRIORITY_TYPING and self._lanes[PRIORITY_TYPING]:
+                # Make room for urgent work by dropping the newest typing job.
+                shed = self._lanes[PRIORITY_TYPING].pop()
+                self._shed += 1
+            elif queued >= self.max_queue or typing_full:
+                self._rejected += 1
+                logger.warning(
+                    "[PII] Inference queue full (lane=%s, queued=%d, active=%d); rejecting job",
+                    PRIORITY_NAMES.get(priority, priority),
+                    queued,
+                    self._active,
+                )
+                raise PiiQueueFullError(self.retry_after_seconds)
+            self._lanes[priority].append(job)
+            self._condition.notify()
+        if shed is not None and shed.future.set_running_or_notify_cancel():
+            logger.info("[PII] Shed queued typing job for a %s job", PRIORITY_NAMES.get(priority, priority))
+            shed.future.set_exception(PiiQueueFullError(self.retry_after_seconds))
+        return job.future
+
+    async def run(
+        self, fn: Callable[..., Any], *args: Any, priority: int = PRIORITY_ANALYZE, **kwargs: Any
+    ) -> Any:
+        """Run a job on the pool and await its result without blocking the loop."""
+        return await asyncio.wrap_future(self.submit(fn, *args, priority=priority, **kwargs))
+
+    def run_sync(
+        self, fn: Callable[..., Any], *args: Any, priority: int = PRIORITY_ANALYZE, **kwargs: Any
+    ) -> Any:
+        """Run a job on the pool from a worker thread and wait for its result."""
+        return self.submit(fn, *args, priority=priority, **kwargs).result()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            return {
+                "workers": self.max_workers,
+                "active": self._active,
+                "queued": self._queued_locked(),
+                "queued_by_lane": {
+                    PRIORITY_NAMES[priority]: len(lane) for priority, lane in self._lanes.items()
+                },
+                "queue_size": self.max_queue,
+                "typing_queue_size": self.max_typing_queued,
+                "rejected": self._rejected,
+                "shed": self._shed,
+            }
+
+    def _queued_locked(self) -> int:
+        return sum(len(lane) for lane in self._lanes.values())
+
+    def _next_job(self) -> _InferenceJob:
+        with self._condition:
+            while True:
+                for priority in sorted(self._lanes):
+                    if self._lanes[priority]:
+                        return self._lanes[priority].popleft()
+                self._condition.wait()
+
+    def _worker(self) -> None:
+        while True:
+            job = self._next_job()
+            if not job.future.set_running_or_notify_cancel():
+                continue
+            with self._condition:
+                self._active += 1
+            try:
+                result = job.fn(*job.args, **job.kwargs)
+            except Exception as exc:
+                job.future.set_exception(exc)
+            else:
+                job.future.set_result(result)
+            finally:
+                with self._condition:
+                    self._active -= 1
+
+
+_executor: Optional[PiiInferenceExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_pii_executor() -> PiiInferenceExecutor:
+    """Get or create the process-wide inference executor."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                # With a worker process pool, keep at least one thread per process
+                # so every process can be busy at once.
+                _executor = PiiInferenceExecutor(
+                    max_workers=max(settings.GLINER_INFERENCE_WORKERS, settings.GLINER_WORKER_PROCESSES),
+                    max_queue=settings.GLINER_INFERENCE_QUEUE_SIZE,
+                    retry_after_seconds=settings.GLINER_RETRY_AFTER_SECONDS,
+                    typing_queue_share=settings.GLINER_TYPING_QUEUE_SHARE,
+                )
+    return _executor
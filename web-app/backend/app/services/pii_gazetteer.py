@@ -0,0 +1,139 @@
+"""
+Per-conversation PII gazetteer.
+
+Once a seed conversation's history is masked, the entity strings it contains
+(the contact's name, their city, a phone number) are known, and drafts often
+repeat them. Each conversation gets an Aho-Corasick automaton over those
+strings, so a draft is scanned in one linear pass and matches come back with
+the labels the model originally assigned, without a model call.
+"""
+import logging
+import threading
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.services.masked_history import MaskedConversation
+
+logger = logging.getLogger(__name__)
+
+# Shorter strings ("Al", "NY") match inside too much ordinary text.
+_MIN_TERM_LENGTH = 3
+
+
+def _fold(text: str) -> str:
+    """Lowercase character by character, keeping offsets aligned with the input."""
+    folded = []
+    for char in text:
+        lowered = char.lower()
+        folded.append(lowered if len(lowered) == 1 else char)
+    return "".join(folded)
+
+
+class AhoCorasick:
+    """Case-insensitive multi-pattern matcher with whole-word matches only."""
+
+    def __init__(self, terms: Iterable[Tuple[str, str]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Per node: (term length, label) for every term ending there.
+        self._output: List[List[Tuple[int, str]]] = [[]]
+        self.size = 0
+        for term, label in terms:
+            self._add(_fold(term), label)
+        self._build_failure_links()
+
+    def _add(self, term: str, label: str) -> None:
+        node = 0
+        for char in term:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = next_node
+        if all(length != len(term) for length, _ in self._output[node]):
+            self._output[node].append((len(term), label))
+            self.size += 1
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._output[child].extend(self._output[self._fail[child]])
+
+    def find(self, text: str) -> List[Dict[str, Any]]:
+        """Return entity dicts (start, end, text, label) for every whole-word match."""
+        folded = _fold(text)
+        matches: List[Dict[str, Any]] = []
+        node = 0
+        for index, char in enumerate(folded):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            for length, label in self._output[node]:
+                start, end = index + 1 - length, index + 1
+                if start > 0 and text[start - 1].isalnum():
+                    continue
+                if end < len(text) and text[end].isalnum():
+                    continue
+                matches.append({"start": start, "end": end, "text": text[start:end], "label": label})
+        matches.sort(key=lambda ent: (ent["start"], -(ent["end"] - ent["start"])))
+        return matches
+
+
+def gazetteer_terms(entry: MaskedConversation) -> List[Tuple[str, str]]:
+    """Distinct (entity text, label) pairs detected in a masked conversation."""
+    terms: Dict[str, Tuple[str, str]] = {}
+    for message_spans in entry.pii_spans:
+        for span in message_spans:
+            text = (span.get("text") or "").strip()
+            if len(text) < _MIN_TERM_LENGTH:
+                continue
+            terms.setdefault(_fold(text), (text, span["label"]))
+    return list(terms.values())
+
+
+class GazetteerStore:
+    """Automata keyed by conversation id, rebuilt when the masked history changes."""
+
+    def __init__(self):
+        self._entries: Dict[int, Tuple[str, AhoCorasick]] = {}
+        self._lock = threading.Lock()
+
+    def for_conversation(self, entry: MaskedConversation) -> AhoCorasick:
+        """Return the automaton for a masked conversation, building it on first use."""
+        with self._lock:
+            cached = self._entries.get(entry.conversation_id)
+        if cached is not None and cached[0] == entry.content_hash:
+            return cached[1]
+        automaton = AhoCorasick(gazetteer_terms(entry))
+        with self._lock:
+            self._entries[entry.conversation_id] = (entry.content_hash, automaton)
+        logger.info(
+            "Built PII gazetteer (conversation_id=%s, terms=%d)",
+            entry.conversation_id,
+            automaton.size,
+        )
+        return automaton
+
+    def find(self, entry: Optional[MaskedConversation], text: str) -> List[Dict[str, Any]]:
+        """Match text against a conversation's gazetteer; no entry means no matches."""
+        if entry is None:
+            return []
+        return self.for_conversation(entry).find(text)
+
+
+_store = GazetteerStore()
+
+
+def get_gazetteer_store() -> GazetteerStore:
+    """Return the process-wide gazetteer store."""
+    return _store
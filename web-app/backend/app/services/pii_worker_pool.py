@@ -0,0 +1,422 @@
+"""
+Multi-process GLiNER worker pool.
+
+Inference inside the web process is limited by the GIL and by a single torch
+intra-op pool. With GLINER_WORKER_PROCESSES > 0 the forward pass runs in N
+worker processes, each with its own model (or, with the "fork" start method,
+sharing the parent's weights copy-on-write). Forking a process whose torch or
+OpenMP thread pools are already running can deadlock the child, so the parent
+loads the fork copy single-threaded and without warmup, forks only once at
+startup, and restarts workers with "spawn". Tokenization, chunking, caching
+and redaction stay in the web process; only GliNERService._predict_batch is
+shipped to a worker, so the messages are plain texts and entity dicts.
+
+Calls go to the worker with the fewest in-flight requests. A worker that dies
+fails its in-flight calls and is restarted in the background, with an
+exponential backoff while it keeps dying before becoming ready. A call that
+gets no answer within the call timeout fails, and its worker is terminated and
+restarted.
+"""
+import itertools
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List, Optional
+
+# Same backend-root import as gliner_registry; spawned workers re-import this
+# module, so the path setup must live here too.
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+from gliner_service import GliNERService
+
+logger = logging.getLogger(__name__)
+
+# Restart delay after a worker exits: doubles with every exit before the
+# worker becomes ready again, up to the cap.
+_RESTART_BACKOFF_SECONDS = 1.0
+_RESTART_BACKOFF_MAX_SECONDS = 60.0
+
+
+class WorkerCrashedError(RuntimeError):
+    """Raised for calls that were in flight on a worker process that died."""
+
+
+class WorkerTimeoutError(RuntimeError):
+    """Raised when a worker does not answer a call within the call timeout."""
+
+
+def _worker_main(conn, service_kwargs: Dict[str, Any], torch_threads: int, preloaded) -> None:
+    """Worker process entry point: load (or inherit) the model, then serve calls."""
+    import torch
+
+    if torch_threads > 0:
+        torch.set_num_threads(torch_threads)
+    service = preloaded
+    if service is None:
+        service = GliNERService(**service_kwargs)
+        service.initialize()
+    elif service_kwargs.get("warmup"):
+        # The parent skipped warmup so it had no thread pools when it forked.
+        try:
+            warmup_seconds = service.warmup()
+        except Exception as exc:
+            logger.warning("GLiNER worker warmup failed (%s); first requests will run cold", exc)
+        else:
+            service.startup_timings["warmup_seconds"] = round(warmup_seconds, 3)
+    conn.send(
+        (
+            "ready",
+            {
+                "backend": service.active_backend,
+                "precision": service.active_precision,
+                "bi_encoder": service.bi_encoder,
+                "startup": service.startup_timings,
+            },
+        )
+    )
+    while True:
+        try:
+            request_id, method, args = conn.recv()
+        except (EOFError, OSError):
+            return
+        try:
+            result = getattr(service, method)(*args)
+        except Exception as exc:
+            conn.send((request_id, False, f"{type(exc).__name__}: {exc}"))
+        else:
+            conn.send((request_id, True, result))
+
+
+class _WorkerHandle:
+    def __init__(self, index: int):
+        self.index = index
+        self.process = None
+        self.conn = None
+        self.ready = False
+        self.info: Dict[str, Any] = {}
+        self.send_lock = threading.Lock()
+        self.inflight: Dict[int, Future] = {}
+        self.restarts = 0
+        # Exits since the worker was last ready; drives the restart backoff.
+        self.failures = 0
+
+
+class GlinerWorkerPool:
+    """Fixed set of GLiNER worker processes with least-loaded dispatch."""
+
+    def __init__(
+        self,
+        size: int,
+        service_kwargs: Dict[str, Any],
+        start_method: str = "spawn",
+        torch_threads: int = 0,
+        preloaded: Optional[GliNERService] = None,
+        call_timeout: Optional[float] = None,
+    ):
+        self.size = max(1, int(size))
+        self.call_timeout = call_timeout if call_timeout and call_timeout > 0 else None
+        self.service_kwargs = service_kwargs
+        self.start_method = start_method
+        self.torch_threads = torch_threads or max(1, (os.cpu_count() or 1) // self.size)
+        self._preloaded = preloaded
+        self._context = multiprocessing.get_context(start_method)
+        # By the time a worker is restarted the parent runs reader threads and
+        # possibly torch thread pools, so forking again could deadlock the child.
+        self._restart_context = (
+            multiprocessing.get_context("spawn") if start_method == "fork" else self._context
+        )
+        self._workers = [_WorkerHandle(index) for index in range(self.size)]
+        self._condition = threading.Condition()
+        self._request_ids = itertools.count(1)
+        self._stopping = False
+
+    def start(self, timeout: Optional[float] = None) -> None:
+        """Start every worker and wait until at least one has loaded the model."""
+        for handle in self._workers:
+            self._spawn(handle)
+        # Every child now holds its own copy-on-write view; restarts load afresh.
+        self._preloaded = None
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while not any(handle.ready for handle in self._workers):
+                if not any(handle.process.is_alive() for handle in self._workers):
+                    raise RuntimeError("All GLiNER worker processes exited during startup")
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("GLiNER worker processes did not become ready")
+                self._condition.wait(1.0 if remaining is None else min(remaining, 1.0))
+
+    def is_running(self) -> bool:
+        return not self._stopping and any(handle.ready for handle in self._workers)
+
+    def worker_info(self) -> Dict[str, Any]:
+        """Backend/precision reported by the first ready worker."""
+        for handle in self._workers:
+            if handle.ready:
+                return dict(handle.info)
+        return {}
+
+    def call(self, method: str, *args: Any) -> Any:
+        """
+        Run GliNERService.<method>(*args) on the least-loaded ready worker.
+
+        Raises WorkerTimeoutError if no worker is ready, or the worker does not
+        answer, within call_timeout.
+        """
+        future: Future = Future()
+        request_id = next(self._request_ids)
+        deadline = None if self.call_timeout is None else time.monotonic() + self.call_timeout
+        with self._condition:
+            while True:
+                if self._stopping:
+                    raise RuntimeError("GLiNER worker pool is stopped")
+                ready = [handle for handle in self._workers if handle.ready]
+                if ready:
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise WorkerTimeoutError("No GLiNER worker process is ready")
+                self._condition.wait(remaining)
+            handle = min(ready, key=lambda worker: len(worker.inflight))
+            handle.inflight[request_id] = future
+        try:
+            with handle.send_lock:
+                handle.conn.send((request_id, method, args))
+        except (OSError, ValueError) as exc:
+            with self._condition:
+                handle.inflight.pop(request_id, None)
+            raise WorkerCrashedError(f"GLiNER worker {handle.index} unavailable: {exc}")
+        remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+        try:
+            return future.result(timeout=remaining)
+        except FutureTimeoutError:
+            with self._condition:
+                handle.inflight.pop(request_id, None)
+                process = handle.process
+            # A hung worker would keep failing calls; kill it so it is restarted.
+            logger.error(
+                "GLiNER worker %d did not answer %s within %.1fs; terminating it",
+                handle.index,
+                method,
+                self.call_timeout,
+            )
+            if process is not None and process.is_alive():
+                process.terminate()
+            raise WorkerTimeoutError(f"GLiNER worker {handle.index} timed out")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            return {
+                "workers": [
+                    {
+                        "index": handle.index,
+                        "pid": handle.process.pid if handle.process is not None else None,
+                        "ready": handle.ready,
+                        "inflight": len(handle.inflight),
+                        "restarts": handle.restarts,
+                    }
+                    for handle in self._workers
+                ],
+                "start_method": self.start_method,
+                "torch_threads": self.torch_threads,
+            }
+
+    def stop(self) -> None:
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        for handle in self._workers:
+            if handle.conn is not None:
+                handle.conn.close()
+            if handle.process is not None and handle.process.is_alive():
+                handle.process.terminate()
+
+    def _spawn(self, handle: _WorkerHandle) -> None:
+        # Only a forked child can inherit the preloaded model without pickling it.
+        preloaded = self._preloaded if self.start_method == "fork" else None
+        context = self._context if handle.restarts == 0 else self._restart_context
+        parent_conn, child_conn = context.Pipe()
+        process = context.Process(
+            target=_worker_main,
+            args=(child_conn, self.service_kwargs, self.torch_threads, preloaded),
+            name=f"gliner-worker-{handle.index}",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        handle.process = process
+        handle.conn = parent_conn
+        threading.Thread(
+            target=self._reader,
+            args=(handle, parent_conn),
+            name=f"gliner-worker-reader-{handle.index}",
+            daemon=True,
+        ).start()
+
+    def _reader(self, handle: _WorkerHandle, conn) -> None:
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                break
+            if message[0] == "ready":
+                with self._condition:
+                    handle.ready = True
+                    handle.info = message[1]
+                    handle.failures = 0
+                    self._condition.notify_all()
+                logger.info("GLiNER worker %d ready (pid=%s)", handle.index, handle.process.pid)
+                continue
+            request_id, ok, payload = message
+            with self._condition:
+                future = handle.inflight.pop(request_id, None)
+            if future is None:
+                continue
+            if ok:
+                future.set_result(payload)
+            else:
+                future.set_exception(RuntimeError(payload))
+        self._on_worker_exit(handle)
+
+    def _on_worker_exit(self, handle: _WorkerHandle) -> None:
+        with self._condition:
+            handle.ready = False
+            failed = list(handle.inflight.values())
+            handle.inflight.clear()
+            stopping = self._stopping
+            self._condition.notify_all()
+        for future in failed:
+            future.set_exception(WorkerCrashedError(f"GLiNER worker {handle.index} exited"))
+        if stopping:
+            return
+        handle.process.join(timeout=1.0)
+        exitcode = handle.process.exitcode
+        handle.failures += 1
+        delay = min(
+            _RESTART_BACKOFF_MAX_SECONDS,
+            _RESTART_BACKOFF_SECONDS * 2 ** (handle.failures - 1),
+        )
+        logger.error(
+            "GLiNER worker %d exited (code=%s); restarting in %.0fs", handle.index, exitcode, delay
+        )
+        # Runs on this worker's reader thread, so only this worker waits.
+        deadline = time.monotonic() + delay
+        with self._condition:
+            while not self._stopping:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            if self._stopping:
+                return
+        handle.restarts += 1
+        self._spawn(handle)
+
+
+class ProcessPoolGliNERService(GliNERService):
+    """
+    GliNERService whose forward passes run in a GlinerWorkerPool.
+
+    The parent keeps only the tokenizer and sentence splitter; everything
+    except _predict_batch (chunking, caching, redaction, incremental mode)
+    runs here unchanged.
+    """
+
+    def __init__(
+        self,
+        processes: int,
+        start_method: str = "spawn",
+        torch_threads: int = 0,
+        call_timeout: Optional[float] = None,
+        **service_kwargs: Any,
+    ):
+        super().__init__(**service_kwargs)
+        self.processes = processes
+        self.start_method = start_method
+        self.torch_threads = torch_threads
+        self.call_timeout = call_timeout
+        self._worker_kwargs = {
+            "model_name": self.model_name,
+            "backend": self.backend,
+            "precision": self.precision,
+            "min_precision_agreement": self.min_precision_agreement,
+            "artifact_dir": self.artifact_dir,
+            "warmup": self.warmup_enabled,
+        }
+        self.pool: Optional[GlinerWorkerPool] = None
+        self._workers_bi_encoder = False
+
+    def initialize(self):
+        if self._initialized:
+            return
+        from transformers import AutoTokenizer
+
+        preloaded = None
+        if self.start_method == "fork":
+            # Load once in the parent; forked workers share the weights copy-on-write.
+            # Forking after torch has started its intra-op/OpenMP threads can
+            # deadlock the children, so load single-threaded and leave warmup
+            # to the workers. The parent runs no inference in pool mode.
+            import torch
+
+            torch.set_num_threads(1)
+            preloaded = GliNERService(**{**self._worker_kwargs, "warmup": False})
+            preloaded.initialize()
+        pool = GlinerWorkerPool(
+            size=self.processes,
+            service_kwargs=self._worker_kwargs,
+            start_method=self.start_method,
+            torch_threads=self.torch_threads,
+            preloaded=preloaded,
+            call_timeout=self.call_timeout,
+        )
+        try:
+            pool.start()
+        except Exception:
+            # Do not leave workers behind for the next initialize() to duplicate.
+            pool.stop()
+            raise
+        self.pool = pool
+        info = self.pool.worker_info()
+        self.active_backend = info.get("backend")
+        self.active_precision = info.get("precision")
+        # Workers load and warm up the model; the parent reports the first one's timings.
+        self.startup_timings = info.get("startup", {})
+        self._workers_bi_encoder = bool(info.get("bi_encoder"))
+        if self.artifact_manifest():
+            self.tokenizer = AutoTokenizer.from_pretrained(self.artifact_dir)
+            self._use_artifact_nltk_data()
+        else:
+            self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        self._ensure_nltk_data()
+        self.model = self.pool
+        self._initialized = True
+        logger.info("GLiNER worker pool started (processes=%d)", self.processes)
+
+    def is_loaded(self) -> bool:
+        return self._initialized and self.pool is not None and self.pool.is_running()
+
+    @property
+    def bi_encoder(self) -> bool:
+        # Label embeddings are cached inside each worker.
+        return self._workers_bi_encoder
+
+    def _predict_batch(
+        self,
+        texts: List[str],
+        labels: Optional[List[str]] = None,
+        threshold: Optional[float] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        return self.pool.call("_predict_batch", texts, labels, threshold)
+
+    def cleanup(self):
+        if self.pool is not None:
+            self.pool.stop()
+            self.pool = None
+        super().cleanup()
@@ -3,10 +3,18 @@ GLiNER service implementation for PII detection and masking.
 Based on the gliner_chunking.ipynb notebook logic.
 """
 
+import bisect
+import contextlib
+import hashlib
+import json
 import logging
 import os
-from typing import List, Optional, Dict, Any, Tuple
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Callable, List, Optional, Dict, Any, Tuple
 from dataclasses import dataclass
+import torch
 from gliner import GLiNER
 from transformers import AutoTokenizer
 from nltk.tokenize import sent_tokenize
@@ -15,6 +23,140 @@ import nltk
 logger = logging.getLogger(__name__)
 
 
+BACKEND_TORCH = "torch"
+BACKEND_ONNX = "onnx"
+
+PRECISION_FP32 = "fp32"
+PRECISION_INT8 = "int8"
+PRECISION_BF16 = "bf16"
+
+# Label profiles: "full" sends every label (final assessment); "typing" is a
+# short prompt for live underlining while the participant types.
+PROFILE_FULL = "full"
+PROFILE_TYPING = "typing"
+
+ONNX_MODEL_FILE = "model.onnx"
+ONNX_INT8_MODEL_FILE = "model_int8.onnx"
+_ONNX_PARITY_FILE = "parity.json"
+
+# Prebuilt model artifact (see build_artifact): safetensors weights, GLiNER
+# config, tokenizer files and punkt data in one directory.
+ARTIFACT_WEIGHTS_FILE = "model.safetensors"
+_ARTIFACT_MANIFEST_FILE = "artifact.json"
+_ARTIFACT_NLTK_DIR = "nltk_data"
+
+# Approximate word counts run once at startup so the first real request does
+# not pay for allocator growth and first-run kernel selection at its length.
+WARMUP_WORD_COUNTS = (16, 64, 256)
+
+# Fixed probe set used to check that an alternative inference path (ONNX,
+# reduced precision) produces the same spans as the PyTorch fp32 model.
+PROBE_TEXTS = [
+    "Here's my information: Kimberly Miller, June 15, 1986, 42 Maple Street, Springfield, IL.",
+    "My full name is Daniel Thompson. My email is daniel.thompson@springfield.edu, "
+    "and my phone number is 555-526-7890.",
+    "I'll send you my work email and that should suffice. It's matthew_1968@gmail.com",
+    "My card is 4111 1111 1111 1111, expires 09/27, CVV 123. SSN 123-45-6789.",
+    "I was diagnosed with type 2 diabetes and take 500mg metformin twice a day at Mercy Hospital.",
+    "Sounds good, see you tomorrow!",
+]
+
+
+def span_signature(entities: List[Dict[str, Any]]) -> List[Tuple[int, int, str]]:
+    """Comparable (start, end, label) view of GLiNER entities."""
+    return sorted((int(ent["start"]), int(ent["end"]), str(ent["label"])) for ent in entities)
+
+
+def span_agreement(
+    reference: List[List[Tuple[int, int, str]]], candidate: List[List[Tuple[int, int, str]]]
+) -> float:
+    """Span-level F1 of candidate against reference signatures (1.0 when both are empty)."""
+    matched = 0
+    total = 0
+    for ref_spans, cand_spans in zip(reference, candidate):
+        matched += len(set(ref_spans) & set(cand_spans))
+        total += len(ref_spans) + len(cand_spans)
+    return 1.0 if total == 0 else 2.0 * matched / total
+
+
+class _SpanModelExportWrapper(torch.nn.Module):
+    """Positional forward() for ONNX export of a span-level GLiNER model."""
+
+    def __init__(self, core: torch.nn.Module):
+        super().__init__()
+        self.core = core
+
+    def forward(self, input_ids, attention_mask, words_mask, text_lengths, span_idx, span_mask):
+        return self.core(
+            input_ids=input_ids,
+            attention_mask=attention_mask,
+            words_mask=words_mask,
+            text_lengths=text_lengths,
+            span_idx=span_idx,
+            span_mask=span_mask,
+        ).logits
+
+
+class _TokenModelExportWrapper(torch.nn.Module):
+    """Positional forward() for ONNX export of a token-level GLiNER model."""
+
+    def __init__(self, core: torch.nn.Module):
+        super().__init__()
+        self.core = core
+
+    def forward(self, input_ids, attention_mask, words_mask, text_lengths):
+        return self.core(
+            input_ids=input_ids,
+            attention_mask=attention_mask,
+            words_mask=words_mask,
+            text_lengths=text_lengths,
+        ).logits
+
+
+def label_tag(label: str) -> str:
+    """Redaction tag for a label, e.g. "email address" -> "[EMAIL_ADDRESS]"."""
+    return f"[{label.upper().replace(' ', '_')}]"
+
+
+def resolve_overlapping_spans(entities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Sort entities by start and drop overlaps, keeping the leftmost span and,
+    among spans starting at the same offset, the longest.
+    """
+    resolved: List[Dict[str, Any]] = []
+    last_end = -1
+    for ent in sorted(entities, key=lambda e: (e["start"], -(e["end"] - e["start"]))):
+        if ent["start"] < last_end or ent["end"] <= ent["start"]:
+            continue
+        resolved.append(ent)
+        last_end = ent["end"]
+    return resolved
+
+
+def redact_spans(text: str, entities: List[Dict[str, Any]]) -> Tuple[str, List[Tuple[int, int]]]:
+    """
+    Replace sorted, non-overlapping entity spans with label tags in one pass.
+
+    Returns the masked text and, per entity, the (start, end) offsets of its
+    tag in the masked text.
+    """
+    parts: List[str] = []
+    masked_offsets: List[Tuple[int, int]] = []
+    cursor = 0
+    masked_length = 0
+    for ent in entities:
+        start, end = ent["start"], ent["end"]
+        parts.append(text[cursor:start])
+        masked_length += start - cursor
+        tag = label_tag(ent["label"])
+        parts.append(tag)
+        masked_offsets.append((masked_length, masked_length + len(tag)))
+        masked_length += len(tag)
+        cursor = end
+    parts.append(text[cursor:])
+    return "".join(parts), masked_offsets
+
+
 @dataclass
 class PiiSpan:
     """Represents a detected PII span."""
@@ -22,6 +164,8 @@ class PiiSpan:
     end: int
     label: str
     text: str
+    masked_start: Optional[int] = None
+    masked_end: Optional[int] = None
 
 
 @dataclass
@@ -32,6 +176,136 @@ class MaskingResult:
     pii_spans: List[PiiSpan]
 
 
+@dataclass
+class IncrementalPlan:
+    """Sentences of a typing draft, their cached entities and the windows still to detect."""
+    text: str
+    sentences: List[Dict[str, Any]]
+    keys: List[str]
+    sentence_entities: List[Optional[List[Dict[str, Any]]]]
+    pending_windows: List[Tuple[int, Dict[str, Any]]]
+
+    @property
+    def window_texts(self) -> List[str]:
+        return [window["text"] for _, window in self.pending_windows]
+
+
+class LruTtlCache:
+    """
+    Thread-safe LRU cache whose entries also expire after a fixed TTL.
+
+    Cached masking results contain raw PII (span text), so expiry is enforced
+    both on access and by a background sweeper: no entry outlives ttl_seconds
+    even if it is never read again.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 300.0):
+        self.max_entries = max(0, int(max_entries))
+        self.ttl_seconds = max(0.0, float(ttl_seconds))
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._expiry: "deque[Tuple[float, str]]" = deque()
+        self._lock = threading.Lock()
+        # Wakes the sweeper when put() schedules an expiry (the queue may have been empty).
+        self._expiry_changed = threading.Condition(self._lock)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        if self.enabled:
+            sweeper = threading.Thread(
+                target=self._sweep_loop,
+                name="gliner-cache-sweeper",
+                daemon=True,
+            )
+            sweeper.start()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Content-addressed key: SHA-256 over the given parts."""
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(str(part).encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    def get(self, key: str, record_miss: bool = True) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            self._purge_expired_locked(now)
+            entry = self._entries.get(key)
+            if entry is None:
+                if record_miss:
+                    self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, value: Any) -> None:
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        expires_at = now + self.ttl_seconds
+        with self._lock:
+            self._purge_expired_locked(now)
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            self._expiry.append((expires_at, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._expiry_changed.notify()
+
+    def purge_expired(self) -> None:
+        with self._lock:
+            self._purge_expired_locked(time.monotonic())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._expiry.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def _purge_expired_locked(self, now: float) -> None:
+        # Insertion order equals expiry order because the TTL is fixed.
+        while self._expiry and self._expiry[0][0] <= now:
+            expires_at, key = self._expiry.popleft()
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == expires_at:
+                del self._entries[key]
+                self.expirations += 1
+        if not self._entries:
+            self._expiry.clear()
+
+    def _sweep_loop(self) -> None:
+        # Sleep until the oldest entry is due, so nothing outlives its TTL.
+        with self._expiry_changed:
+            while True:
+                now = time.monotonic()
+                self._purge_expired_locked(now)
+                if self._expiry:
+                    self._expiry_changed.wait(self._expiry[0][0] - now)
+                else:
+                    self._expiry_changed.wait()
+
+
 class GliNERService:
     """Service for GLiNER-based PII detection and masking."""
     
@@ -90,10 +364,68 @@ class GliNERService:
         "password",
         "vehicle id"
     ]
+
+    # GLiNER prepends every label to the input, so prompt cost grows with the
+    # label count. The typing profile keeps the most common direct identifiers.
+    TYPING_LABELS = [
+        "name",
+        "email address",
+        "phone number",
+        "location address",
+        "credit card",
+        "bank account",
+        "ssn",
+        "passport number",
+        "password",
+    ]
     
-    def __init__(self, model_name: str | None = None):
+    def __init__(
+        self,
+        model_name: str | None = None,
+        cache: Optional[LruTtlCache] = None,
+        backend: str | None = None,
+        precision: str | None = None,
+        min_precision_agreement: float | None = None,
+        chunk_batch_size: int | None = None,
+        artifact_dir: str | None = None,
+        warmup: bool | None = None,
+    ):
         """Initialize GLiNER model and tokenizer."""
         self.model_name = model_name or os.getenv("GLINER_MODEL_NAME", "knowledgator/gliner-pii-base-v1.0")
+        self.cache = cache
+        self.backend = (backend or os.getenv("GLINER_BACKEND", BACKEND_TORCH)).strip().lower()
+        self.active_backend: Optional[str] = None
+        self.precision = (precision or os.getenv("GLINER_PRECISION", PRECISION_FP32)).strip().lower()
+        self.min_precision_agreement = (
+            min_precision_agreement
+            if min_precision_agreement is not None
+            else float(os.getenv("GLINER_PRECISION_MIN_AGREEMENT", "0.95"))
+        )
+        self.active_precision: Optional[str] = None
+        self.chunk_batch_size = max(
+            1,
+            chunk_batch_size
+            if chunk_batch_size is not None
+            else int(os.getenv("GLINER_CHUNK_BATCH_SIZE", "8")),
+        )
+        self.artifact_dir = artifact_dir if artifact_dir is not None else os.getenv("GLINER_ARTIFACT_DIR", "")
+        self.warmup_enabled = (
+            warmup
+            if warmup is not None
+            else os.getenv("GLINER_WARMUP", "1").strip().lower() not in ("0", "false", "no", "off")
+        )
+        # Filled in by initialize(): load/warmup durations and whether the artifact was used.
+        self.startup_timings: Dict[str, Any] = {}
+        # Called with the stage name ("model", "tokenizer", "warmup") as initialize() advances.
+        self.progress_callback: Optional[Callable[[str], None]] = None
+        # Set by the owning registry so lazy (re)loads go through its lock and
+        # lifecycle state instead of calling initialize() directly.
+        self.loader: Optional[Callable[[], Any]] = None
+        # Bi-encoder checkpoints only: label embeddings keyed by label tuple, so
+        # each forward pass encodes just the text. None when not in use.
+        self._label_embeddings: Optional[Dict[Tuple[str, ...], torch.Tensor]] = None
+        self.precision_agreement: Optional[float] = None
+        self._autocast_dtype = None
         self.model: Optional[GLiNER] = None
         self.tokenizer: Optional[AutoTokenizer] = None
         self.labels = (
@@ -103,7 +435,12 @@ class GliNERService:
             self.HEALTHCARE_LABELS +
             self.ID_LABELS
         )
+        self.label_profiles: Dict[str, List[str]] = {
+            PROFILE_FULL: self.labels,
+            PROFILE_TYPING: list(self.TYPING_LABELS),
+        }
         self._initialized = False
+        self._sentence_tokenizer = None
         
     def _ensure_nltk_data(self):
         """Ensure NLTK punkt tokenizer data is available."""
@@ -119,27 +456,447 @@ class GliNERService:
             return
         
         try:
-            logger.info(f"Loading GLiNER model: {self.model_name}")
-            try:
-                self.model = GLiNER.from_pretrained(self.model_name, strict=False)
-            except TypeError:
-                self.model = GLiNER.from_pretrained(self.model_name)
-            self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+            started = time.perf_counter()
+            artifact = self.artifact_manifest()
+            logger.info(
+                f"Loading GLiNER model: {self.model_name} (backend={self.backend}, "
+                f"artifact={'yes' if artifact else 'no'})"
+            )
+            self._report_progress("model")
+            if self.backend == BACKEND_ONNX:
+                self.model, self.active_backend = self._load_onnx_model()
+            else:
+                self.model, self.active_backend = self._load_torch_model(), BACKEND_TORCH
+            self._apply_precision()
+            self._encode_label_profiles()
+            self._report_progress("tokenizer")
+            if artifact:
+                self.tokenizer = AutoTokenizer.from_pretrained(self.artifact_dir)
+                self._use_artifact_nltk_data()
+            else:
+                self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
             self._ensure_nltk_data()
             self._initialized = True
-            logger.info("GLiNER model loaded successfully")
+            load_seconds = time.perf_counter() - started
+            warmup_seconds = None
+            if self.warmup_enabled:
+                self._report_progress("warmup")
+                try:
+                    warmup_seconds = self.warmup()
+                except Exception as exc:
+                    logger.warning("GLiNER warmup failed (%s); first requests will run cold", exc)
+            self.startup_timings = {
+                "artifact": bool(artifact),
+                "load_seconds": round(load_seconds, 3),
+                "warmup_seconds": None if warmup_seconds is None else round(warmup_seconds, 3),
+                "time_to_first_inference_seconds": (
+                    None if warmup_seconds is None else round(load_seconds + warmup_seconds, 3)
+                ),
+            }
+            logger.info(
+                "GLiNER model loaded successfully (backend=%s, load=%.2fs, warmup=%s)",
+                self.active_backend,
+                load_seconds,
+                "off" if warmup_seconds is None else f"{warmup_seconds:.2f}s",
+            )
         except Exception as e:
             logger.error(f"Failed to load GLiNER model: {e}")
             raise
+
+    @property
+    def bi_encoder(self) -> bool:
+        """Whether the loaded model encodes labels separately from the text."""
+        config = getattr(self.model, "config", None)
+        return getattr(config, "labels_encoder", None) is not None
+
+    def _encode_label_profiles(self) -> None:
+        """
+        Pre-encode every label profile once for bi-encoder models.
+
+        Runs after _apply_precision so the embeddings come from the model that
+        will serve requests (int8 or bf16 included).
+        """
+        self._label_embeddings = None
+        if self.active_backend != BACKEND_TORCH or not self.bi_encoder:
+            return
+        self._label_embeddings = {}
+        for labels in self.label_profiles.values():
+            self._label_embeddings_for(labels)
+        logger.info("GLiNER bi-encoder: cached label embeddings for %d profiles", len(self.label_profiles))
+
+    def _label_embeddings_for(self, labels: List[str]) -> torch.Tensor:
+        key = tuple(labels)
+        embeddings = self._label_embeddings.get(key)
+        if embeddings is None:
+            with self._inference_context():
+                embeddings = self.model.encode_labels(labels, batch_size=len(labels))
+            self._label_embeddings[key] = embeddings
+        return embeddings
+
+    def _report_progress(self, stage: str) -> None:
+        if self.progress_callback is not None:
+            try:
+                self.progress_callback(stage)
+            except Exception:
+                logger.exception("GLiNER progress callback failed")
+
+    def _use_artifact_nltk_data(self) -> None:
+        """Look up punkt in the artifact first (idempotent across reloads)."""
+        nltk_dir = os.path.join(self.artifact_dir, _ARTIFACT_NLTK_DIR)
+        if nltk_dir not in nltk.data.path:
+            nltk.data.path.insert(0, nltk_dir)
+
+    def warmup(self) -> float:
+        """
+        Run one inference per label profile at each WARMUP_WORD_COUNTS length.
+
+        Returns the elapsed seconds. Sentence splitting and tokenization run
+        too, so their lazy loads also happen before the first request.
+        """
+        started = time.perf_counter()
+        words = " ".join(PROBE_TEXTS).split()
+        texts = [
+            " ".join(words[index % len(words)] for index in range(count)) for count in WARMUP_WORD_COUNTS
+        ]
+        self._sentence_spans(texts[-1])
+        self._token_offsets(texts[-1])
+        for labels in self.label_profiles.values():
+            for text in texts:
+                self._predict_batch([text], labels)
+        return time.perf_counter() - started
+
+    def _load_torch_model(self) -> GLiNER:
+        if self.artifact_manifest():
+            try:
+                return self._load_artifact_model()
+            except Exception as exc:
+                logger.warning(
+                    "GLiNER artifact at %s failed to load (%s); using from_pretrained", self.artifact_dir, exc
+                )
+        try:
+            return GLiNER.from_pretrained(self.model_name, strict=False)
+        except TypeError:
+            return GLiNER.from_pretrained(self.model_name)
+
+    def artifact_manifest(self) -> Optional[Dict[str, Any]]:
+        """Manifest of the prebuilt artifact if one exists for this model, else None."""
+        if not self.artifact_dir:
+            return None
+        try:
+            with open(os.path.join(self.artifact_dir, _ARTIFACT_MANIFEST_FILE)) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if manifest.get("model_name") != self.model_name:
+            logger.warning(
+                "GLiNER artifact at %s was built for %s, not %s; ignoring it",
+                self.artifact_dir,
+                manifest.get("model_name"),
+                self.model_name,
+            )
+            return None
+        return manifest
+
+    def build_artifact(self, artifact_dir: Optional[str] = None) -> str:
+        """
+        Write the startup artifact for this model (run at image build time).
+
+        The directory holds every parameter and buffer in one safetensors file,
+        the GLiNER config with the encoder config inlined (so loading needs no
+        hub lookups), the tokenizer files and NLTK punkt data.
+        """
+        from safetensors.torch import save_file
+
+        artifact_dir = artifact_dir or self.artifact_dir
+        if not artifact_dir:
+            raise ValueError("No artifact directory given and GLINER_ARTIFACT_DIR is not set")
+        os.makedirs(artifact_dir, exist_ok=True)
+        logger.info("Building GLiNER artifact for %s at %s", self.model_name, artifact_dir)
+        model = GLiNER.from_pretrained(self.model_name)
+        if model.config.encoder_config is None:
+            model.config.encoder_config = model.model.token_rep_layer.bert_layer.model.config
+        if model.config.labels_encoder is not None and model.config.labels_encoder_config is None:
+            model.config.labels_encoder_config = model.model.token_rep_layer.labels_encoder.model.config
+        # Non-persistent buffers (e.g. position ids) are stored too, so the loader
+        # can build the model on the meta device and assign every tensor.
+        tensors = {
+            name: tensor.detach().contiguous().clone()
+            for name, tensor in list(model.model.state_dict().items()) + list(model.model.named_buffers())
+        }
+        save_file(tensors, os.path.join(artifact_dir, ARTIFACT_WEIGHTS_FILE))
+        model.config.to_json_file(os.path.join(artifact_dir, "gliner_config.json"))
+        model.data_processor.transformer_tokenizer.save_pretrained(artifact_dir)
+        nltk_dir = os.path.join(artifact_dir, _ARTIFACT_NLTK_DIR)
+        for package in ("punkt", "punkt_tab"):
+            if not nltk.download(package, download_dir=nltk_dir, quiet=True):
+                raise RuntimeError(f"Could not download NLTK {package} data into {nltk_dir}")
+        with open(os.path.join(artifact_dir, _ARTIFACT_MANIFEST_FILE), "w") as f:
+            json.dump({"model_name": self.model_name, "tensors": len(tensors), "built_at": time.time()}, f)
+        return artifact_dir
+
+    def _load_artifact_model(self) -> GLiNER:
+        """
+        Load the prebuilt artifact without the HF loaders.
+
+        The model is constructed on the meta device (no random init) and its
+        tensors are assigned straight from the memory-mapped safetensors file,
+        so weights are paged in on first use instead of copied at startup.
+        """
+        from gliner import GLiNERConfig
+        from safetensors.torch import load_file
+
+        with open(os.path.join(self.artifact_dir, "gliner_config.json")) as f:
+            config = GLiNERConfig(**json.load(f))
+        tokenizer = AutoTokenizer.from_pretrained(self.artifact_dir)
+        with torch.device("meta"):
+            model = GLiNER(config, tokenizer=tokenizer, encoder_from_pretrained=False)
+        core = model.model
+        for name, tensor in load_file(os.path.join(self.artifact_dir, ARTIFACT_WEIGHTS_FILE)).items():
+            owner_name, _, leaf = name.rpartition(".")
+            owner = core.get_submodule(owner_name)
+            if leaf in owner._parameters:
+                owner._parameters[leaf] = torch.nn.Parameter(tensor, requires_grad=False)
+            else:
+                owner._buffers[leaf] = tensor
+        unassigned = [
+            name for name, tensor in list(core.named_parameters()) + list(core.named_buffers()) if tensor.is_meta
+        ]
+        if unassigned:
+            raise RuntimeError(f"artifact is missing {len(unassigned)} tensors (e.g. {unassigned[0]})")
+        model.eval()
+        return model
+
+    def onnx_artifact_dir(self) -> str:
+        """Directory for the exported ONNX model, cached under HF_HOME."""
+        hf_home = os.getenv("HF_HOME") or os.path.join(os.path.expanduser("~"), ".cache", "huggingface")
+        return os.path.join(hf_home, "gliner-onnx", self.model_name.replace("/", "--"))
+
+    def _load_onnx_model(self) -> Tuple[GLiNER, str]:
+        """
+        Load the ONNX Runtime model, exporting it once if needed.
+
+        A fresh export is checked against the PyTorch model on PROBE_TEXTS and
+        the outcome is recorded next to the artifact; if spans differ, the
+        service falls back to PyTorch (now and on later starts).
+        """
+        artifact_dir = self.onnx_artifact_dir()
+        parity_path = os.path.join(artifact_dir, _ONNX_PARITY_FILE)
+        torch_model: Optional[GLiNER] = None
+        if not os.path.exists(parity_path):
+            torch_model = self._load_torch_model()
+            if torch_model.config.labels_encoder is not None:
+                # The export wrappers cover uni-encoder models only; bi-encoders
+                # get their speedup from cached label embeddings instead.
+                logger.warning("GLiNER %s is a bi-encoder; ONNX export skipped, using PyTorch", self.model_name)
+                return torch_model, BACKEND_TORCH
+            self._export_onnx(torch_model, artifact_dir)
+
+        onnx_model = GLiNER.from_pretrained(
+            artifact_dir,
+            load_onnx_model=True,
+            load_tokenizer=True,
+            onnx_model_file=ONNX_MODEL_FILE,
+        )
+
+        if torch_model is not None:
+            # Every label profile is probed: the prompt length depends on the label count.
+            mismatches = [
+                text
+                for labels in self.label_profiles.values()
+                for text in PROBE_TEXTS
+                if span_signature(torch_model.predict_entities(text, labels))
+                != span_signature(onnx_model.predict_entities(text, labels))
+            ]
+            with open(parity_path, "w") as f:
+                json.dump({"passed": not mismatches, "mismatches": len(mismatches)}, f)
+            if mismatches:
+                logger.error(
+                    "ONNX export of %s changed spans on %d/%d probe texts; using PyTorch",
+                    self.model_name,
+                    len(mismatches),
+                    len(PROBE_TEXTS) * len(self.label_profiles),
+                )
+                return torch_model, BACKEND_TORCH
+        else:
+            with open(parity_path) as f:
+                if not json.load(f).get("passed"):
+                    logger.warning("ONNX artifact for %s failed parity earlier; using PyTorch", self.model_name)
+                    return self._load_torch_model(), BACKEND_TORCH
+
+        return onnx_model, BACKEND_ONNX
+
+    def _apply_precision(self) -> None:
+        """
+        Switch the loaded model to the configured precision, then self-check.
+
+        fp32 spans on PROBE_TEXTS are recorded first; if the reduced-precision
+        model's span F1 against them drops below min_precision_agreement, the
+        fp32 model is restored.
+        """
+        self.active_precision = PRECISION_FP32
+        if self.precision == PRECISION_FP32:
+            return
+        if self.precision not in (PRECISION_INT8, PRECISION_BF16):
+            logger.warning("Unknown GLiNER precision %r; using fp32", self.precision)
+            return
+
+        reference = self._probe_signatures()
+        fp32_model = self.model
+        try:
+            if self.active_backend == BACKEND_ONNX:
+                if self.precision != PRECISION_INT8:
+                    logger.warning("GLiNER precision %s is not supported on ONNX; using fp32", self.precision)
+                    return
+                self.model = self._load_onnx_int8_model()
+            elif self.precision == PRECISION_INT8:
+                fp32_core = self.model.model
+                self.model.model = torch.quantization.quantize_dynamic(
+                    fp32_core, {torch.nn.Linear}, dtype=torch.qint8
+                )
+            else:
+                if not self._cpu_supports_bf16():
+                    logger.warning("CPU lacks bf16 support; using fp32")
+                    return
+                self._autocast_dtype = torch.bfloat16
+            agreement = span_agreement(reference, self._probe_signatures())
+        except Exception as exc:
+            logger.error("GLiNER %s setup failed (%s); using fp32", self.precision, exc)
+            agreement = 0.0
+
+        self.precision_agreement = agreement
+        if agreement < self.min_precision_agreement:
+            logger.warning(
+                "GLiNER %s spans agree %.3f with fp32 (< %.3f); falling back to fp32",
+                self.precision,
+                agreement,
+                self.min_precision_agreement,
+            )
+            if self.active_backend == BACKEND_TORCH and self.precision == PRECISION_INT8:
+                fp32_model.model = fp32_core
+            self.model = fp32_model
+            self._autocast_dtype = None
+            return
+        self.active_precision = self.precision
+        logger.info("GLiNER running in %s (probe agreement %.3f)", self.precision, agreement)
+
+    def _probe_signatures(self) -> List[List[Tuple[int, int, str]]]:
+        return [
+            span_signature(entities)
+            for labels in self.label_profiles.values()
+            for entities in self._predict_batch(PROBE_TEXTS, labels)
+        ]
+
+    @staticmethod
+    def _cpu_supports_bf16() -> bool:
+        try:
+            return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+        except Exception:
+            return False
+
+    def _load_onnx_int8_model(self) -> GLiNER:
+        """Load a dynamically quantized copy of the exported ONNX model."""
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        artifact_dir = self.onnx_artifact_dir()
+        int8_path = os.path.join(artifact_dir, ONNX_INT8_MODEL_FILE)
+        if not os.path.exists(int8_path):
+            quantize_dynamic(
+                os.path.join(artifact_dir, ONNX_MODEL_FILE),
+                int8_path,
+                weight_type=QuantType.QInt8,
+            )
+        return GLiNER.from_pretrained(
+            artifact_dir,
+            load_onnx_model=True,
+            load_tokenizer=True,
+            onnx_model_file=ONNX_INT8_MODEL_FILE,
+        )
+
+    def _inference_context(self):
+        """bf16 autocast when that precision is active, otherwise a no-op."""
+        if self._autocast_dtype is None:
+            return contextlib.nullcontext()
+        return torch.autocast("cpu", dtype=self._autocast_dtype)
+
+    def _export_onnx(self, model: GLiNER, artifact_dir: str) -> None:
+        """Export the GLiNER core network to ONNX alongside its config and tokenizer."""
+        os.makedirs(artifact_dir, exist_ok=True)
+        logger.info("Exporting GLiNER model %s to ONNX at %s", self.model_name, artifact_dir)
+        # Trace with a padded multi-text batch so no batch or length dimension is
+        # specialised to a constant in the exported graph.
+        model_input, _ = model.prepare_model_inputs(PROBE_TEXTS[:2], self.labels)
+        dynamic_axes = {
+            "input_ids": {0: "batch_size", 1: "sequence_length"},
+            "attention_mask": {0: "batch_size", 1: "sequence_length"},
+            "words_mask": {0: "batch_size", 1: "sequence_length"},
+            "text_lengths": {0: "batch_size", 1: "value"},
+            "logits": {0: "position", 1: "batch_size", 2: "sequence_length", 3: "num_classes"},
+        }
+        if model.config.span_mode == "token_level":
+            wrapper = _TokenModelExportWrapper(model.model)
+            input_names = ["input_ids", "attention_mask", "words_mask", "text_lengths"]
+        else:
+            wrapper = _SpanModelExportWrapper(model.model)
+            input_names = ["input_ids", "attention_mask", "words_mask", "text_lengths", "span_idx", "span_mask"]
+            dynamic_axes["span_idx"] = {0: "batch_size", 1: "num_spans", 2: "idx"}
+            dynamic_axes["span_mask"] = {0: "batch_size", 1: "num_spans"}
+        wrapper.eval()
+        with torch.no_grad():
+            torch.onnx.export(
+                wrapper,
+                tuple(model_input[name] for name in input_names),
+                os.path.join(artifact_dir, ONNX_MODEL_FILE),
+                input_names=input_names,
+                output_names=["logits"],
+                dynamic_axes=dynamic_axes,
+                opset_version=14,
+                dynamo=False,
+            )
+        model.config.to_json_file(os.path.join(artifact_dir, "gliner_config.json"))
+        model.data_processor.transformer_tokenizer.save_pretrained(artifact_dir)
     
     def is_loaded(self) -> bool:
         """Check if model is loaded."""
         return self._initialized and self.model is not None
+
+    def _ensure_loaded(self) -> None:
+        """Load the model on first use, through the owning registry when there is one."""
+        if self.is_loaded():
+            return
+        if self.loader is not None:
+            self.loader()
+        else:
+            self.initialize()
+
+    def count_tokens(self, text: str) -> int:
+        """Count tokenizer tokens in text (no special tokens)."""
+        self._ensure_loaded()
+        return len(self.tokenizer.encode(text, add_special_tokens=False))
+
+    def labels_for(self, profile: str = PROFILE_FULL) -> List[str]:
+        """Return the label list for a named profile."""
+        try:
+            return self.label_profiles[profile]
+        except KeyError:
+            raise ValueError(f"Unknown GLiNER label profile: {profile!r}")
+
+    def _token_offsets(self, text: str) -> Optional[List[Tuple[int, int]]]:
+        """
+        Tokenize once and return per-token (start, end) character offsets.
+
+        Returns None for slow tokenizers, which cannot report offsets; callers
+        then fall back to per-sentence token counts.
+        """
+        if not getattr(self.tokenizer, "is_fast", False):
+            return None
+        encoding = self.tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)
+        return [tuple(offset) for offset in encoding["offset_mapping"]]
     
     def mask_and_chunk(
         self,
         text: str,
-        max_tokens: int = 512
+        max_tokens: int = 512,
+        profile: str = PROFILE_FULL,
     ) -> MaskingResult:
         """
         Mask PII entities and chunk text.
@@ -147,42 +904,81 @@ class GliNERService:
         Args:
             text: Input text to process
             max_tokens: Maximum tokens per chunk
+            profile: Label profile to detect with
             
         Returns:
             MaskingResult with masked text, chunks, and PII spans
         """
-        if not self.is_loaded():
-            self.initialize()
-        logger.info("GLiNER masking start (len=%s)", len(text))
+        cached = self.lookup_cached(text, max_tokens, profile=profile)
+        if cached is not None:
+            return cached
+        result = self._mask_and_chunk_uncached(text, max_tokens, profile=profile)
+        self._store_cached(text, max_tokens, result, profile)
+        return result
+
+    def lookup_cached(
+        self,
+        text: str,
+        max_tokens: int = 512,
+        record_miss: bool = True,
+        profile: str = PROFILE_FULL,
+    ) -> Optional[MaskingResult]:
+        """Return a cached masking result for text, or None."""
+        if self.cache is None:
+            return None
+        return self.cache.get(self._cache_key(text, max_tokens, profile), record_miss=record_miss)
+
+    def _store_cached(
+        self, text: str, max_tokens: int, result: MaskingResult, profile: str = PROFILE_FULL
+    ) -> None:
+        if self.cache is not None:
+            self.cache.put(self._cache_key(text, max_tokens, profile), result)
+
+    def _cache_key(self, text: str, max_tokens: int, profile: str = PROFILE_FULL) -> str:
+        """Key on content, model, label profile and chunk size so results never leak across configs."""
+        return LruTtlCache.make_key(
+            self.model_name, profile, "|".join(self.labels_for(profile)), max_tokens, text
+        )
+
+    def _mask_and_chunk_uncached(
+        self,
+        text: str,
+        max_tokens: int,
+        token_offsets: Optional[List[Tuple[int, int]]] = None,
+        profile: str = PROFILE_FULL,
+    ) -> MaskingResult:
+        self._ensure_loaded()
+        labels = self.labels_for(profile)
+        logger.info("GLiNER masking start (len=%s, profile=%s)", len(text), profile)
 
-        token_count = len(self.tokenizer.encode(text, add_special_tokens=False))
+        # One tokenizer pass drives both the chunking decision and chunk boundaries.
+        if token_offsets is None:
+            token_offsets = self._token_offsets(text)
+        token_count = (
+            len(token_offsets) if token_offsets is not None else self.count_tokens(text)
+        )
         pii_spans: List[PiiSpan] = []
 
         # Mirror notebook behavior: no chunking when input is within limit.
         if token_count <= max_tokens:
-            masked_text, entities = self._redact_with_gliner(text)
-            for ent in entities:
-                pii_spans.append(
-                    PiiSpan(
-                        start=ent["start"],
-                        end=ent["end"],
-                        label=ent["label"],
-                        text=text[ent["start"]:ent["end"]],
-                    )
-                )
-            pii_spans.sort(key=lambda x: x.start)
-            return MaskingResult(
-                masked_text=masked_text,
-                chunks=[masked_text] if masked_text else [],
-                pii_spans=pii_spans,
-            )
+            masked_text, entities = self._redact_with_gliner(text, labels)
+            return self._build_unchunked_result(text, masked_text, entities)
 
         # Mirror notebook behavior for long input:
         # sentence chunking (no overlap) -> per-chunk GLiNER redaction -> join.
-        chunk_infos = self._chunk_sentences_with_metadata(text, max_tokens)
+        # All chunks go through batched forward passes (chunk_batch_size at a
+        # time) instead of one call per chunk.
+        chunk_infos = self._chunk_sentences_with_metadata(text, max_tokens, token_offsets)
+        chunk_texts = [chunk_info["text"] for chunk_info in chunk_infos]
+        chunk_entities: List[List[Dict[str, Any]]] = []
+        for offset in range(0, len(chunk_texts), self.chunk_batch_size):
+            chunk_entities.extend(
+                self._predict_batch(chunk_texts[offset:offset + self.chunk_batch_size], labels)
+            )
         redacted_chunks: List[str] = []
-        for chunk_info in chunk_infos:
-            redacted_chunk, entities = self._redact_with_gliner(chunk_info["text"])
+        masked_base = 0
+        for chunk_info, raw_entities in zip(chunk_infos, chunk_entities):
+            redacted_chunk, entities = self._apply_redaction(chunk_info["text"], raw_entities)
             redacted_chunks.append(redacted_chunk)
 
             for ent in entities:
@@ -196,8 +992,12 @@ class GliNERService:
                         end=end,
                         label=ent["label"],
                         text=text[start:end],
+                        masked_start=masked_base + ent["masked_start"],
+                        masked_end=masked_base + ent["masked_end"],
                     )
                 )
+            # Chunks are joined with a single space below.
+            masked_base += len(redacted_chunk) + 1
 
         pii_spans.sort(key=lambda x: x.start)
         return MaskingResult(
@@ -206,14 +1006,354 @@ class GliNERService:
             pii_spans=pii_spans,
         )
 
-    def _redact_with_gliner(self, text_chunk: str) -> Tuple[str, List[Dict[str, Any]]]:
+    def mask_batch(
+        self,
+        texts: List[str],
+        max_tokens: int = 512,
+        profile: str = PROFILE_FULL,
+    ) -> List[MaskingResult]:
+        """
+        Mask several independent texts in one batched GLiNER prediction.
+
+        Texts within max_tokens are padded together into a single forward pass;
+        longer texts fall back to the sentence-chunked mask_and_chunk path.
+        Span offsets in each result are local to that text.
+
+        Args:
+            texts: Input texts to process
+            max_tokens: Maximum tokens per text before chunking
+            profile: Label profile to detect with
+
+        Returns:
+            One MaskingResult per input text, in input order
+        """
+        self._ensure_loaded()
+        labels = self.labels_for(profile)
+        logger.info("GLiNER batch masking start (items=%s, profile=%s)", len(texts), profile)
+
+        results: List[Optional[MaskingResult]] = [None] * len(texts)
+        batch_indices: List[int] = []
+        for index, text in enumerate(texts):
+            if not text:
+                results[index] = MaskingResult(masked_text=text, chunks=[], pii_spans=[])
+                continue
+            cached = self.lookup_cached(text, max_tokens, profile=profile)
+            if cached is not None:
+                results[index] = cached
+                continue
+            token_offsets = self._token_offsets(text)
+            token_count = (
+                len(token_offsets) if token_offsets is not None else self.count_tokens(text)
+            )
+            if token_count <= max_tokens:
+                batch_indices.append(index)
+            else:
+                results[index] = self._mask_and_chunk_uncached(
+                    text, max_tokens, token_offsets, profile=profile
+                )
+                self._store_cached(text, max_tokens, results[index], profile)
+
+        if batch_indices:
+            batch_texts = [texts[index] for index in batch_indices]
+            batch_entities = self._predict_batch(batch_texts, labels)
+            for index, text, entities in zip(batch_indices, batch_texts, batch_entities):
+                masked_text, entities = self._apply_redaction(text, entities)
+                results[index] = self._build_unchunked_result(text, masked_text, entities)
+                self._store_cached(text, max_tokens, results[index], profile)
+
+        return results
+
+    def screen_candidates(
+        self,
+        texts: List[str],
+        threshold: float,
+        max_tokens: int = 512,
+        profile: str = PROFILE_FULL,
+    ) -> List[bool]:
+        """
+        Whether each text has any entity scoring at least threshold.
+
+        A cheap screening pass for the model cascade: long texts are sentence
+        chunked as in mask_and_chunk and every chunk is predicted in batches of
+        chunk_batch_size; no redaction or caching happens.
+        """
+        self._ensure_loaded()
+        labels = self.labels_for(profile)
+        owners: List[int] = []
+        pieces: List[str] = []
+        for index, text in enumerate(texts):
+            if not text:
+                continue
+            token_offsets = self._token_offsets(text)
+            token_count = len(token_offsets) if token_offsets is not None else self.count_tokens(text)
+            if token_count <= max_tokens:
+                chunks = [text]
+            else:
+                chunks = [
+                    chunk_info["text"]
+                    for chunk_info in self._chunk_sentences_with_metadata(text, max_tokens, token_offsets)
+                ]
+            owners.extend([index] * len(chunks))
+            pieces.extend(chunks)
+
+        flags = [False] * len(texts)
+        for offset in range(0, len(pieces), self.chunk_batch_size):
+            batch = pieces[offset:offset + self.chunk_batch_size]
+            predictions = self._predict_batch(batch, labels, threshold)
+            for owner, entities in zip(owners[offset:offset + self.chunk_batch_size], predictions):
+                if entities:
+                    flags[owner] = True
+        return flags
+
+    def unmasked_result(self, text: str, max_tokens: int = 512) -> MaskingResult:
+        """The result mask_and_chunk returns when no entity is found, built without a model call."""
+        self._ensure_loaded()
+        token_offsets = self._token_offsets(text)
+        token_count = len(token_offsets) if token_offsets is not None else self.count_tokens(text)
+        if token_count <= max_tokens:
+            return MaskingResult(masked_text=text, chunks=[text] if text else [], pii_spans=[])
+        chunks = [
+            chunk_info["text"]
+            for chunk_info in self._chunk_sentences_with_metadata(text, max_tokens, token_offsets)
+        ]
+        return MaskingResult(masked_text=" ".join(chunks), chunks=chunks, pii_spans=[])
+
+    @property
+    def incremental_available(self) -> bool:
+        """Incremental masking needs the result cache to keep per-sentence entities."""
+        return self.cache is not None and self.cache.enabled
+
+    def mask_incremental(self, text: str, profile: str = PROFILE_FULL) -> MaskingResult:
+        """
+        Mask a typing draft, re-running GLiNER only on sentences that changed.
+
+        The draft is split into sentences with exact offsets. Each sentence is
+        detected together with its preceding sentence as context, and its
+        entities are cached (sentence-relative) under the pair's content hash,
+        so a keystroke in the last sentence only re-detects that sentence.
+        Cached and fresh entities are stitched back to draft offsets. Without
+        a result cache every sentence would be re-detected with its context,
+        so the draft is masked in full mode instead.
+
+        Args:
+            text: Draft text to process
+            profile: Label profile to detect with
+
+        Returns:
+            MaskingResult with masked text and draft-level PII spans
+        """
+        if not self.incremental_available:
+            return self.mask_and_chunk(text, profile=profile)
+        plan = self.plan_incremental(text, profile)
+        window_entities = (
+            self._predict_batch(plan.window_texts, self.labels_for(profile))
+            if plan.pending_windows
+            else []
+        )
+        return self.complete_incremental(plan, window_entities)
+
+    def plan_incremental(self, text: str, profile: str = PROFILE_FULL) -> IncrementalPlan:
+        """
+        Split a draft into sentences and look up their cached entities.
+
+        The plan's window_texts are the context+sentence windows still to be
+        detected; predict them with predict_entities (possibly batched with other
+        drafts' windows) and pass the entities to complete_incremental.
+        """
+        self._ensure_loaded()
+        labels = self.labels_for(profile)
+
+        sentences = [
+            {"text": text[start:end], "start": start, "end": end}
+            for start, end in self._sentence_spans(text)
+        ]
+        sentence_entities: List[Optional[List[Dict[str, Any]]]] = [None] * len(sentences)
+        keys: List[str] = []
+        pending_windows: List[Tuple[int, Dict[str, Any]]] = []
+        for index, sentence in enumerate(sentences):
+            context = sentences[index - 1] if index > 0 else None
+            key = LruTtlCache.make_key(
+                "sentence",
+                self.model_name,
+                profile,
+                "|".join(labels),
+                context["text"] if context else "",
+                sentence["text"],
+            )
+            keys.append(key)
+            cached = self.cache.get(key) if self.cache is not None else None
+            if cached is not None:
+                sentence_entities[index] = cached
+                continue
+            window = [context, sentence] if context else [sentence]
+            pending_windows.append((index, self._build_chunk_info(window)))
+
+        logger.info(
+            "GLiNER incremental masking (sentences=%s, redetected=%s)",
+            len(sentences),
+            len(pending_windows),
+        )
+        return IncrementalPlan(
+            text=text,
+            sentences=sentences,
+            keys=keys,
+            sentence_entities=sentence_entities,
+            pending_windows=pending_windows,
+        )
+
+    def complete_incremental(
+        self, plan: IncrementalPlan, window_entities: List[List[Dict[str, Any]]]
+    ) -> MaskingResult:
+        """Cache fresh sentence entities and build the draft result from a plan."""
+        sentences = plan.sentences
+        sentence_entities = plan.sentence_entities
+        for (index, window), entities in zip(plan.pending_windows, window_entities):
+            sentence = sentences[index]
+            local_entities: List[Dict[str, Any]] = []
+            for ent in entities:
+                global_span = self._map_chunk_entity_to_original(ent, window["segments"])
+                if global_span is None:
+                    continue
+                start, end = global_span
+                # Entities inside the context sentence belong to that sentence's own window.
+                if start < sentence["start"] or end > sentence["end"]:
+                    continue
+                local_entities.append(
+                    {
+                        "start": start - sentence["start"],
+                        "end": end - sentence["start"],
+                        "label": ent["label"],
+                    }
+                )
+            sentence_entities[index] = local_entities
+            if self.cache is not None:
+                self.cache.put(plan.keys[index], local_entities)
+
+        entities = [
+            {
+                "start": sentence["start"] + ent["start"],
+                "end": sentence["start"] + ent["end"],
+                "label": ent["label"],
+            }
+            for sentence, local_entities in zip(sentences, sentence_entities)
+            for ent in local_entities or []
+        ]
+        masked_text, entities = self._apply_redaction(plan.text, entities)
+        return self._build_unchunked_result(plan.text, masked_text, entities)
+
+    def predict_entities(self, texts: List[str], profile: str = PROFILE_FULL) -> List[List[Dict[str, Any]]]:
+        """Raw GLiNER entities for short texts, one forward pass per chunk_batch_size texts."""
+        self._ensure_loaded()
+        labels = self.labels_for(profile)
+        entities: List[List[Dict[str, Any]]] = []
+        for offset in range(0, len(texts), self.chunk_batch_size):
+            entities.extend(self._predict_batch(texts[offset:offset + self.chunk_batch_size], labels))
+        return entities
+
+    def _sentence_spans(self, text: str) -> List[Tuple[int, int]]:
+        """Sentence (start, end) offsets from the same Punkt model sent_tokenize uses."""
+        if self._sentence_tokenizer is None:
+            self._sentence_tokenizer = nltk.data.load("tokenizers/punkt/english.pickle")
+        return list(self._sentence_tokenizer.span_tokenize(text))
+
+    def _build_unchunked_result(
+        self, text: str, masked_text: str, entities: List[Dict[str, Any]]
+    ) -> MaskingResult:
+        """Build the result for text redacted without chunking (entities from _apply_redaction)."""
+        pii_spans = [
+            PiiSpan(
+                start=ent["start"],
+                end=ent["end"],
+                label=ent["label"],
+                text=text[ent["start"]:ent["end"]],
+                masked_start=ent["masked_start"],
+                masked_end=ent["masked_end"],
+            )
+            for ent in entities
+        ]
+        return MaskingResult(
+            masked_text=masked_text,
+            chunks=[masked_text] if masked_text else [],
+            pii_spans=pii_spans,
+        )
+
+    def _predict_batch(
+        self,
+        texts: List[str],
+        labels: Optional[List[str]] = None,
+        threshold: Optional[float] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """Run GLiNER over several texts as one padded batch (all labels, default threshold)."""
+        labels = labels or self.labels
+        if self._label_embeddings is not None:
+            return self._predict_with_label_embeddings(texts, labels, threshold)
+        kwargs = {} if threshold is None else {"threshold": threshold}
+        with self._inference_context():
+            return self.model.run(texts, labels, batch_size=len(texts), **kwargs)
+
+    @torch.no_grad()
+    def _predict_with_label_embeddings(
+        self, texts: List[str], labels: List[str], threshold: Optional[float] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Bi-encoder forward pass that encodes only the texts.
+
+        Equivalent to GLiNER.run for bi-encoder checkpoints, but passes the
+        cached label embeddings to the network so the label encoder is skipped.
+        (GLiNER.batch_predict_with_embeds does the same in principle but does
+        not match the decoder output format of the pinned gliner release.)
+        """
+        embeddings = self._label_embeddings_for(labels)
+        with self._inference_context():
+            model_input, raw_batch = self.model.prepare_model_inputs(texts, labels, prepare_entities=False)
+            logits = self.model.model(labels_embeddings=embeddings, **model_input)[0]
+        if not isinstance(logits, torch.Tensor):
+            logits = torch.from_numpy(logits)
+        decoded = self.model.decoder.decode(
+            raw_batch["tokens"],
+            raw_batch["id_to_classes"],
+            logits.float(),
+            flat_ner=True,
+            threshold=0.5 if threshold is None else threshold,
+            multi_label=False,
+        )
+        results: List[List[Dict[str, Any]]] = []
+        for index, spans in enumerate(decoded):
+            starts = raw_batch["all_start_token_idx_to_text_idx"][index]
+            ends = raw_batch["all_end_token_idx_to_text_idx"][index]
+            entities = []
+            for span in spans:
+                start_token, end_token, label, score = span[0], span[1], span[2], span[-1]
+                start, end = starts[start_token], ends[end_token]
+                entities.append(
+                    {"start": start, "end": end, "text": texts[index][start:end], "label": label, "score": score}
+                )
+            results.append(entities)
+        return results
+
+    def _redact_with_gliner(
+        self, text_chunk: str, labels: Optional[List[str]] = None
+    ) -> Tuple[str, List[Dict[str, Any]]]:
         """Notebook-equivalent GLiNER redaction for a text chunk."""
-        entities = self.model.predict_entities(text_chunk, self.labels)
-        redacted = text_chunk
-        for ent in sorted(entities, key=lambda x: x["start"], reverse=True):
-            tag = f"[{ent['label'].upper().replace(' ', '_')}]"
-            redacted = redacted[:ent["start"]] + tag + redacted[ent["end"]:]
-        return redacted, entities
+        entities = self._predict_batch([text_chunk], labels)[0]
+        return self._apply_redaction(text_chunk, entities)
+
+    def _apply_redaction(
+        self, text_chunk: str, entities: List[Dict[str, Any]]
+    ) -> Tuple[str, List[Dict[str, Any]]]:
+        """
+        Replace each entity span with its [LABEL] tag.
+
+        Overlaps are resolved first. Returns the masked text and the kept
+        entities, sorted by start, each annotated with masked_start/masked_end.
+        """
+        resolved = resolve_overlapping_spans(entities)
+        masked_text, masked_offsets = redact_spans(text_chunk, resolved)
+        annotated = [
+            {**ent, "masked_start": masked_start, "masked_end": masked_end}
+            for ent, (masked_start, masked_end) in zip(resolved, masked_offsets)
+        ]
+        return masked_text, annotated
 
     def _chunk_sentences(self, text: str, max_tokens: int) -> List[str]:
         """Notebook-equivalent sentence chunking: no overlaps and no repetition."""
@@ -240,42 +1380,40 @@ class GliNERService:
 
         return chunks
 
-    def _chunk_sentences_with_metadata(self, text: str, max_tokens: int) -> List[Dict[str, Any]]:
+    def _chunk_sentences_with_metadata(
+        self,
+        text: str,
+        max_tokens: int,
+        token_offsets: Optional[List[Tuple[int, int]]] = None,
+    ) -> List[Dict[str, Any]]:
         """
         Build sentence chunks with metadata to map chunk-local offsets back
         to original text offsets.
+
+        Sentence offsets come straight from Punkt span_tokenize. When the
+        whole-text token offsets are given, each sentence's token count is the
+        number of tokens starting inside it, so no sentence is re-tokenized.
         """
-        sentences = sent_tokenize(text)
-        if not sentences:
+        spans = self._sentence_spans(text)
+        if not spans:
             return []
 
-        # Align each NLTK sentence with original-text offsets.
-        aligned: List[Dict[str, Any]] = []
-        cursor = 0
-        for sentence in sentences:
-            start = text.find(sentence, cursor)
-            if start == -1:
-                start = text.find(sentence)
-            if start == -1:
-                # Fallback keeps chunking stable even if alignment is imperfect.
-                start = cursor
-                end = min(len(text), start + len(sentence))
-            else:
-                end = start + len(sentence)
-            cursor = end
-            aligned.append({"text": sentence, "start": start, "end": end})
+        if token_offsets is not None:
+            token_starts = [start for start, _ in token_offsets]
+            first_tokens = [bisect.bisect_left(token_starts, start) for start, _ in spans]
+            first_tokens.append(len(token_starts))
+            sentence_token_lens = [
+                first_tokens[index + 1] - first_tokens[index] for index in range(len(spans))
+            ]
+        else:
+            sentence_token_lens = [self.count_tokens(text[start:end]) for start, end in spans]
 
         chunks: List[Dict[str, Any]] = []
         current_sentences: List[Dict[str, Any]] = []
         current_tokens = 0
 
-        for sentence_info in aligned:
-            sentence_tokens = self.tokenizer.encode(
-                sentence_info["text"],
-                add_special_tokens=False,
-            )
-            sentence_token_len = len(sentence_tokens)
-
+        for (start, end), sentence_token_len in zip(spans, sentence_token_lens):
+            sentence_info = {"text": text[start:end], "start": start, "end": end}
             if current_tokens + sentence_token_len <= max_tokens:
                 current_sentences.append(sentence_info)
                 current_tokens += sentence_token_len
@@ -326,5 +1464,6 @@ class GliNERService:
         """Cleanup resources."""
         self.model = None
         self.tokenizer = None
+        self._label_embeddings = None
         self._initialized = False
         logger.info("GLiNER service cleaned up")
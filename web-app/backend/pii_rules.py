@@ -0,0 +1,275 @@
+"""
+Deterministic rule-based PII detection.
+
+Compiled regular expressions plus validators (Luhn for card numbers, address
+grammar for emails/URLs/IPs, digit-count and area checks for phone numbers and
+SSNs, known postal code shapes) find structured PII in microseconds. Spans use
+the same label names as GliNERService, so they can be shown on their own
+("fast" detection) or merged with model spans ("hybrid" detection).
+"""
+import ipaddress
+import re
+from typing import Any, Callable, Dict, List, Optional, Pattern, Sequence, Tuple
+
+from gliner_service import MaskingResult, PiiSpan, redact_spans, resolve_overlapping_spans
+
+DETECTOR_MODEL = "model"
+DETECTOR_FAST = "fast"
+DETECTOR_HYBRID = "hybrid"
+
+_US_STATES = (
+    "AL|AK|AZ|AR|CA|CO|CT|DE|FL|GA|HI|ID|IL|IN|IA|KS|KY|LA|ME|MD|MA|MI|MN|MS|MO|MT|NE|NV|NH|"
+    "NJ|NM|NY|NC|ND|OH|OK|OR|PA|RI|SC|SD|TN|TX|UT|VT|VA|WA|WV|WI|WY|DC"
+)
+
+_URL_TRAILING_PUNCTUATION = ".,;:!?)]}'\""
+
+
+def luhn_valid(digits: str) -> bool:
+    """Luhn checksum over a string of digits."""
+    total = 0
+    for index, char in enumerate(reversed(digits)):
+        value = int(char)
+        if index % 2 == 1:
+            value *= 2
+            if value > 9:
+                value -= 9
+        total += value
+    return total % 10 == 0
+
+
+def _only_digits(value: str) -> str:
+    return "".join(char for char in value if char.isdigit())
+
+
+def _valid_email(value: str) -> bool:
+    local, _, domain = value.rpartition("@")
+    if not local or len(local) > 64 or len(domain) > 253:
+        return False
+    if local.startswith(".") or local.endswith(".") or ".." in local:
+        return False
+    return all(0 < len(label) <= 63 for label in domain.split("."))
+
+
+def _valid_url(value: str) -> bool:
+    host = re.sub(r"^(?:https?://)", "", value, flags=re.IGNORECASE).split("/", 1)[0]
+    host = host.rsplit("@", 1)[-1].split(":", 1)[0]
+    return "." in host.strip(".") or host.lower() == "localhost"
+
+
+def _valid_ip(value: str) -> bool:
+    try:
+        address = ipaddress.ip_address(value)
+    except ValueError:
+        return False
+    # Bare "::"-style shorthands are more likely times or code than addresses.
+    return address.version == 4 or len(_only_digits(value)) + sum(c.isalpha() for c in value) >= 4
+
+
+def _valid_card(value: str) -> bool:
+    digits = _only_digits(value)
+    if not 13 <= len(digits) <= 19 or len(set(digits)) == 1:
+        return False
+    return luhn_valid(digits)
+
+
+def _valid_ssn(value: str) -> bool:
+    area, group, serial = re.split(r"[- ]", value)
+    if area in ("000", "666") or area.startswith("9"):
+        return False
+    return group != "00" and serial != "0000"
+
+
+_NANP_GROUPING = re.compile(r"(?:1[\s.-]?)?\d{3}[\s.-]\d{3}[\s.-]\d{4}")
+
+
+def _valid_nanp_digits(value: str) -> bool:
+    # Area code and exchange both start with 2-9; 11 digits need the "1" prefix.
+    digits = _only_digits(value)
+    if len(digits) == 11 and digits.startswith("1"):
+        digits = digits[1:]
+    return len(digits) == 10 and digits[0] not in "01" and digits[3] not in "01"
+
+
+def _valid_phone(value: str) -> bool:
+    digits = _only_digits(value)
+    if not 10 <= len(digits) <= 15:
+        return False
+    # Separators alone do not make a phone number ("2023 2024 2025", "100 200
+    # 300 400"): grouped digits need a country code ("+"), an area code in
+    # parentheses or NANP 3-3-4 grouping. Plain digit runs look the same as
+    # order numbers and timestamps, so they are left to the keyword rule below.
+    return value.startswith("+") or "(" in value or bool(_NANP_GROUPING.fullmatch(value))
+
+
+# (label, pattern, validator, capture group holding the span)
+_RULES: List[Tuple[str, Pattern[str], Optional[Callable[[str], bool]], int]] = [
+    (
+        "email address",
+        re.compile(
+            r"(?<![\w.%+-])[A-Za-z0-9._%+-]+@(?:[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?\.)+"
+            r"[A-Za-z]{2,63}(?![\w-])"
+        ),
+        _valid_email,
+        0,
+    ),
+    (
+        "url",
+        re.compile(r"\b(?:https?://|www\.)[^\s<>\"']+", re.IGNORECASE),
+        _valid_url,
+        0,
+    ),
+    (
+        "ip address",
+        re.compile(r"(?<![\w.])(?:\d{1,3}\.){3}\d{1,3}(?![\w.])"),
+        _valid_ip,
+        0,
+    ),
+    (
+        "ip address",
+        re.compile(r"(?<![\w:])(?:[0-9A-Fa-f]{0,4}:){2,7}[0-9A-Fa-f]{1,4}(?![\w:])"),
+        _valid_ip,
+        0,
+    ),
+    (
+        "credit card",
+        re.compile(r"(?<![\d-])\d(?:[ -]?\d){12,18}(?![\d-])"),
+        _valid_card,
+        0,
+    ),
+    (
+        "ssn",
+        re.compile(r"(?<![\d-])\d{3}[- ]\d{2}[- ]\d{4}(?![\d-])"),
+        _valid_ssn,
+        0,
+    ),
+    (
+        "phone number",
+        re.compile(
+            r"(?<![\w+])(?:\+\d{1,3}[\s.-]?|1[\s.-])?(?:\(\d{2,4}\)[\s.-]?)?\d{2,4}(?:[\s.-]?\d{2,4}){1,4}(?![\w-])"
+        ),
+        _valid_phone,
+        0,
+    ),
+    (
+        "phone number",
+        # Plain digit runs only after a phone keyword, e.g. "call me at 2125550123".
+        re.compile(
+            r"\b(?:call(?:ed|ing)?|phone|tel(?:ephone)?|mobile|cell(?:phone)?|fax|text|sms)\b"
+            r"[^\d\n]{0,20}?(?<![\w+])(\d{10,11})(?![\w-])",
+            re.IGNORECASE,
+        ),
+        _valid_nanp_digits,
+        1,
+    ),
+    (
+        "location zip",
+        re.compile(rf"\b(?:{_US_STATES}),?\s+(\d{{5}}(?:-\d{{4}})?)\b"),
+        None,
+        1,
+    ),
+    (
+        "location zip",
+        re.compile(r"\b(?:zip|postal|post)\s*(?:code)?\s*[:#]?\s*(\d{5}(?:-\d{4})?)\b", re.IGNORECASE),
+        None,
+        1,
+    ),
+    (
+        "location zip",
+        re.compile(r"(?<![\d-])\d{5}-\d{4}(?![\d-])"),
+        None,
+        0,
+    ),
+    (
+        "location zip",
+        # UK postcodes, e.g. "SW1A 1AA", "M1 1AE".
+        re.compile(r"\b[A-Z]{1,2}\d[A-Z\d]?\s?\d[ABD-HJLNP-UW-Z]{2}\b"),
+        None,
+        0,
+    ),
+    (
+        "location zip",
+        # Canadian postal codes, e.g. "K1A 0B1".
+        re.compile(r"\b[ABCEGHJ-NPRSTVXY]\d[ABCEGHJ-NPRSTV-Z][ -]?\d[ABCEGHJ-NPRSTV-Z]\d\b"),
+        None,
+        0,
+    ),
+]
+
+RULE_LABELS = sorted({label for label, _, _, _ in _RULES})
+
+
+def detect_rule_entities(text: str) -> List[Dict[str, Any]]:
+    """
+    Find rule-based PII entities in text.
+
+    Returns GLiNER-style entity dicts (start, end, text, label, score) sorted
+    by start; overlaps between rules are resolved by the caller.
+    """
+    entities: List[Dict[str, Any]] = []
+    for label, pattern, validator, group in _RULES:
+        for match in pattern.finditer(text):
+            start, end = match.span(group)
+            if label == "url":
+                while end > start and text[end - 1] in _URL_TRAILING_PUNCTUATION:
+                    end -= 1
+            value = text[start:end]
+            if validator is not None and not validator(value):
+                continue
+            entities.append({"start": start, "end": end, "text": value, "label": label, "score": 1.0})
+    entities.sort(key=lambda ent: (ent["start"], -(ent["end"] - ent["start"])))
+    return entities
+
+
+def _build_result(text: str, entities: List[Dict[str, Any]]) -> MaskingResult:
+    resolved = resolve_overlapping_spans(entities)
+    masked_text, masked_offsets = redact_spans(text, resolved)
+    return MaskingResult(
+        masked_text=masked_text,
+        chunks=[masked_text] if masked_text else [],
+        pii_spans=[
+            PiiSpan(
+                start=ent["start"],
+                end=ent["end"],
+                label=ent["label"],
+                text=text[ent["start"]:ent["end"]],
+                masked_start=masked_start,
+                masked_end=masked_end,
+            )
+            for ent, (masked_start, masked_end) in zip(resolved, masked_offsets)
+        ],
+    )
+
+
+def mask_with_rules(text: str, extra_entities: Sequence[Dict[str, Any]] = ()) -> MaskingResult:
+    """
+    Mask text using only the rule-based detector (no model call).
+
+    extra_entities (e.g. gazetteer matches) are masked alongside the rule spans.
+    """
+    return _build_result(text, detect_rule_entities(text) + list(extra_entities))
+
+
+def merge_rule_spans(
+    text: str,
+    result: MaskingResult,
+    extra_entities: Sequence[Dict[str, Any]] = (),
+) -> MaskingResult:
+    """
+    Merge rule-based spans (and extra_entities) into a model MaskingResult.
+
+    Spans overlapping a model span are dropped, so model labels win; the
+    result is returned unchanged when nothing new is added.
+    """
+    model_entities = [
+        {"start": span.start, "end": span.end, "label": span.label} for span in result.pii_spans
+    ]
+    covered = [(ent["start"], ent["end"]) for ent in model_entities]
+    extra = [
+        ent
+        for ent in detect_rule_entities(text) + list(extra_entities)
+        if not any(ent["start"] < end and start < ent["end"] for start, end in covered)
+    ]
+    if not extra:
+        return result
+    return _build_result(text, model_entities + extra)
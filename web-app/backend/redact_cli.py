@@ -0,0 +1,356 @@
+"""
+Offline bulk redaction of JSONL/CSV corpora with GliNERService.
+
+Streams records from the input file, masks the text field in batches on a
+pool of worker processes (one model per worker) and appends each record to the
+output with the masked text and its spans. At most a few batches per worker
+are held in memory at once, so corpus size is bounded only by disk.
+
+Output is written in input order. After each batch a small checkpoint next to
+the output (<output>.progress.json) records how many input records are done and
+the output size; --resume truncates the output to that size and carries on
+from the next input record.
+
+Usage:
+    python redact_cli.py responses.jsonl redacted.jsonl --text-field original_input
+    python redact_cli.py corpus.csv redacted.csv --workers 8 --batch-size 32 --resume
+"""
+import argparse
+import csv
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from dataclasses import asdict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from gliner_service import PROFILE_FULL, PROFILE_TYPING, GliNERService
+from pii_rules import DETECTOR_FAST, DETECTOR_HYBRID, DETECTOR_MODEL, mask_with_rules, merge_rule_spans
+
+logger = logging.getLogger("redact_cli")
+
+FORMAT_JSONL = "jsonl"
+FORMAT_CSV = "csv"
+
+_PROGRESS_SUFFIX = ".progress.json"
+# Batches in flight per worker; enough to keep every worker busy while the
+# parent writes results, small enough to keep memory flat.
+_INFLIGHT_PER_WORKER = 2
+
+# Per-process state set up by _init_worker.
+_service: Optional[GliNERService] = None
+_detector = DETECTOR_MODEL
+
+
+def _init_worker(service_kwargs: Dict[str, Any], torch_threads: int, detector: str) -> None:
+    """Pool initializer: load the model once per worker process."""
+    global _service, _detector
+    _detector = detector
+    if detector == DETECTOR_FAST:
+        return
+    import torch
+
+    if torch_threads > 0:
+        torch.set_num_threads(torch_threads)
+    _service = GliNERService(**service_kwargs)
+    _service.initialize()
+
+
+def _redact_batch(
+    texts: List[str],
+    max_tokens: int,
+    profile: str,
+) -> List[Tuple[str, List[Dict[str, Any]]]]:
+    """Mask one batch of texts; returns (masked_text, spans) per text."""
+    if _detector == DETECTOR_FAST:
+        results = [mask_with_rules(text) for text in texts]
+    else:
+        results = _service.mask_batch(texts, max_tokens, profile)
+        if _detector == DETECTOR_HYBRID:
+            results = [merge_rule_spans(text, result) for text, result in zip(texts, results)]
+    return [(result.masked_text, [asdict(span) for span in result.pii_spans]) for result in results]
+
+
+def _detect_format(path: str, requested: Optional[str]) -> str:
+    if requested:
+        return requested
+    return FORMAT_CSV if path.lower().endswith(".csv") else FORMAT_JSONL
+
+
+def _read_jsonl(handle) -> Iterator[Optional[Dict[str, Any]]]:
+    """Yield one record per line; None for lines that are not a JSON object."""
+    for line_number, line in enumerate(handle, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as exc:
+            logger.warning("Skipping line %d: invalid JSON (%s)", line_number, exc)
+            yield None
+            continue
+        if not isinstance(record, dict):
+            logger.warning("Skipping line %d: not a JSON object", line_number)
+            yield None
+            continue
+        yield record
+
+
+def _batched(records: Iterator[Optional[Dict[str, Any]]], size: int) -> Iterator[List[Optional[Dict[str, Any]]]]:
+    batch: List[Optional[Dict[str, Any]]] = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _load_progress(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, encoding="utf-8") as handle:
+            return json.load(handle)
+    except FileNotFoundError:
+        return None
+
+
+def _save_progress(path: str, progress: Dict[str, Any]) -> None:
+    """Write the checkpoint atomically so an interruption never leaves it half-written."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        json.dump(progress, handle)
+    os.replace(tmp_path, path)
+
+
+class _Throughput:
+    """Running record/char counts, logged every report_seconds and at the end."""
+
+    def __init__(self, report_seconds: float, already_done: int):
+        self.report_seconds = report_seconds
+        self.already_done = already_done
+        self.records = 0
+        self.chars = 0
+        self.spans = 0
+        self.skipped = 0
+        self.started = time.perf_counter()
+        self._last_report = self.started
+
+    def add(self, records: int, chars: int, spans: int, skipped: int) -> None:
+        self.records += records
+        self.chars += chars
+        self.spans += spans
+        self.skipped += skipped
+        now = time.perf_counter()
+        if self.report_seconds > 0 and now - self._last_report >= self.report_seconds:
+            self._last_report = now
+            self.report("Progress")
+
+    def report(self, prefix: str) -> None:
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        logger.info(
+            "%s: %d records (%d total), %d spans, %d skipped in %.1fs; %.1f records/s, %.0f chars/s",
+            prefix,
+            self.records,
+            self.already_done + self.records,
+            self.spans,
+            self.skipped,
+            elapsed,
+            self.records / elapsed,
+            self.chars / elapsed,
+        )
+
+
+def run(args: argparse.Namespace) -> int:
+    input_format = _detect_format(args.input, args.input_format)
+    output_format = _detect_format(args.output, args.output_format)
+    progress_path = args.output + _PROGRESS_SUFFIX
+
+    progress = _load_progress(progress_path) if args.resume else None
+    if progress is not None and progress.get("input") != os.path.abspath(args.input):
+        logger.error("%s belongs to a different input (%s)", progress_path, progress.get("input"))
+        return 2
+    if progress is None and os.path.exists(args.output) and not args.overwrite:
+        if args.resume:
+            logger.error("%s has no checkpoint to resume from; pass --overwrite to start over", args.output)
+        else:
+            logger.error("%s already exists; pass --resume to continue it or --overwrite to replace it", args.output)
+        return 2
+    if progress is not None and progress.get("done"):
+        logger.info("%s is already complete (%d records)", args.output, progress["input_records"])
+        return 0
+    done_records = progress["input_records"] if progress else 0
+
+    if args.detector == DETECTOR_FAST:
+        workers = 0
+    elif args.workers is not None:
+        workers = max(0, args.workers)
+    else:
+        workers = max(1, (os.cpu_count() or 1) // 4)
+    torch_threads = args.torch_threads or max(1, (os.cpu_count() or 1) // max(1, workers))
+    service_kwargs = {"model_name": args.model_name, "warmup": False}
+    if args.artifact_dir is not None:
+        service_kwargs["artifact_dir"] = args.artifact_dir
+    initargs = (service_kwargs, torch_threads, args.detector)
+
+    pool = None
+    if workers > 0:
+        logger.info("Starting %d worker processes (%d torch threads each)", workers, torch_threads)
+        pool = multiprocessing.get_context(args.start_method).Pool(workers, _init_worker, initargs)
+    else:
+        _init_worker(*initargs)
+
+    input_handle = open(args.input, encoding="utf-8", newline="" if input_format == FORMAT_CSV else None)
+    if progress is not None:
+        output_handle = open(args.output, "r+", encoding="utf-8", newline="")
+        output_handle.seek(progress["output_bytes"])
+        output_handle.truncate()
+        logger.info("Resuming after %d input records", done_records)
+    else:
+        output_handle = open(args.output, "w", encoding="utf-8", newline="")
+
+    try:
+        if input_format == FORMAT_CSV:
+            csv.field_size_limit(sys.maxsize)
+            reader = csv.DictReader(input_handle)
+            records: Iterator[Optional[Dict[str, Any]]] = reader
+        else:
+            reader = None
+            records = _read_jsonl(input_handle)
+        for _ in itertools.islice(records, done_records):
+            pass
+
+        csv_writer = None
+        if output_format == FORMAT_CSV:
+            fieldnames = list(reader.fieldnames or []) if reader is not None else list(args.csv_columns or [])
+            if args.text_field not in fieldnames:
+                fieldnames.append(args.text_field)
+            fieldnames += [args.masked_field, args.spans_field]
+            csv_writer = csv.DictWriter(output_handle, fieldnames=fieldnames, extrasaction="ignore")
+            if progress is None:
+                csv_writer.writeheader()
+
+        def checkpoint(done: bool) -> None:
+            output_handle.flush()
+            _save_progress(
+                progress_path,
+                {
+                    "input": os.path.abspath(args.input),
+                    "input_records": done_records,
+                    "output_bytes": output_handle.tell(),
+                    "done": done,
+                },
+            )
+
+        # Written before the first batch too, so a run interrupted during model
+        # load can still be resumed.
+        checkpoint(done=False)
+        throughput = _Throughput(args.report_seconds, done_records)
+        window: deque = deque()
+
+        def write_batch(batch: List[Optional[Dict[str, Any]]], results) -> None:
+            nonlocal done_records
+            chars = spans = skipped = 0
+            for record, (masked_text, pii_spans) in zip(batch, results):
+                if record is None:
+                    skipped += 1
+                    continue
+                text = record.get(args.text_field)
+                if isinstance(text, str):
+                    chars += len(text)
+                    spans += len(pii_spans)
+                else:
+                    masked_text, pii_spans = text, []
+                record[args.masked_field] = masked_text
+                if csv_writer is not None:
+                    record[args.spans_field] = json.dumps(pii_spans, ensure_ascii=False)
+                    csv_writer.writerow(record)
+                else:
+                    record[args.spans_field] = pii_spans
+                    output_handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+            done_records += len(batch)
+            checkpoint(done=False)
+            throughput.add(len(batch) - skipped, chars, spans, skipped)
+
+        max_inflight = max(1, workers * _INFLIGHT_PER_WORKER)
+        for batch in _batched(records, max(1, args.batch_size)):
+            texts = [
+                record.get(args.text_field) if record is not None else None for record in batch
+            ]
+            texts = [text if isinstance(text, str) else "" for text in texts]
+            if pool is None:
+                write_batch(batch, _redact_batch(texts, args.max_tokens, args.profile))
+                continue
+            window.append((batch, pool.apply_async(_redact_batch, (texts, args.max_tokens, args.profile))))
+            if len(window) >= max_inflight:
+                pending_batch, pending = window.popleft()
+                write_batch(pending_batch, pending.get())
+        while window:
+            pending_batch, pending = window.popleft()
+            write_batch(pending_batch, pending.get())
+
+        checkpoint(done=True)
+        throughput.report("Done")
+    except KeyboardInterrupt:
+        logger.warning("Interrupted after %d input records; rerun with --resume to continue", done_records)
+        return 130
+    finally:
+        input_handle.close()
+        output_handle.close()
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Redact PII in a JSONL or CSV file with GLiNER.",
+    )
+    parser.add_argument("input", help="Input .jsonl or .csv file")
+    parser.add_argument("output", help="Output .jsonl or .csv file")
+    parser.add_argument("--input-format", choices=[FORMAT_JSONL, FORMAT_CSV], help="Default: from the file extension")
+    parser.add_argument("--output-format", choices=[FORMAT_JSONL, FORMAT_CSV], help="Default: from the file extension")
+    parser.add_argument("--text-field", default="original_input", help="Field holding the text to redact")
+    parser.add_argument("--masked-field", default="masked_text", help="Output field for the masked text")
+    parser.add_argument("--spans-field", default="pii_spans", help="Output field for the detected spans")
+    parser.add_argument(
+        "--csv-columns",
+        nargs="+",
+        help="Columns to keep when writing CSV from JSONL input (default: the text field)",
+    )
+    parser.add_argument("--profile", choices=[PROFILE_FULL, PROFILE_TYPING], default=PROFILE_FULL)
+    parser.add_argument(
+        "--detector",
+        choices=[DETECTOR_MODEL, DETECTOR_HYBRID, DETECTOR_FAST],
+        default=DETECTOR_MODEL,
+        help="model: GLiNER only; hybrid: GLiNER plus rule spans; fast: rules only, no model",
+    )
+    parser.add_argument("--model-name", help="Default: GLINER_MODEL_NAME")
+    parser.add_argument("--artifact-dir", help="Prebuilt model artifact; default: GLINER_ARTIFACT_DIR")
+    parser.add_argument("--max-tokens", type=int, default=512, help="Texts longer than this are sentence-chunked")
+    parser.add_argument("--batch-size", type=int, default=16, help="Records per batched forward pass")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Worker processes, one model each; 0 runs in this process (default: CPUs / 4)",
+    )
+    parser.add_argument("--torch-threads", type=int, default=0, help="Torch threads per worker (default: CPUs / workers)")
+    parser.add_argument("--start-method", choices=["spawn", "fork", "forkserver"], default="spawn")
+    parser.add_argument("--report-seconds", type=float, default=10.0, help="Throughput log interval")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--resume", action="store_true", help="Continue an interrupted run from its checkpoint")
+    mode.add_argument("--overwrite", action="store_true", help="Replace an existing output file")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s", stream=sys.stderr)
+    return run(build_parser().parse_args(argv))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Tests import the backend the way uvicorn does: from web-app/backend.
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
@@ -0,0 +1,38 @@
+import pytest
+
+from pii_rules import detect_rule_entities
+
+
+def _phones(text):
+    return [ent["text"] for ent in detect_rule_entities(text) if ent["label"] == "phone number"]
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("call me at (555) 526-7890", ["(555) 526-7890"]),
+        ("reach me on +44 20 7946 0958", ["+44 20 7946 0958"]),
+        ("my number is 212-555-0123", ["212-555-0123"]),
+        ("dial 1-800-555-1234 now", ["1-800-555-1234"]),
+        ("call me at 2125550123", ["2125550123"]),
+        ("Phone: 12125550123", ["12125550123"]),
+    ],
+)
+def test_phone_numbers_are_detected(text, expected):
+    assert _phones(text) == expected
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "created at 1700000000 and updated at 1700003600",
+        "Order 4567891234 has shipped",
+        "order number 8005550123 is ready",
+        "I have 3 kids and 1234567890 tokens",
+        "The year 2023 2024 2025 had 100 200 300 400 people",
+        "call me about ticket 1234567890",
+        "phone ID 10005550123",
+    ],
+)
+def test_bare_digit_runs_are_not_phone_numbers(text):
+    assert _phones(text) == []
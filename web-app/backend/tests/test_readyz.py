@@ -0,0 +1,58 @@
+import threading
+
+from fastapi.testclient import TestClient
+
+import gliner_service
+from app.main import app
+from app.services import gliner_registry
+from app.services.gliner_registry import GlinerModelRegistry
+
+
+class _Model:
+    class config:
+        labels_encoder = None
+
+
+class _Tokenizer:
+    @staticmethod
+    def from_pretrained(*args, **kwargs):
+        return object()
+
+
+def test_readyz_is_503_while_warmup_runs(monkeypatch):
+    warming = threading.Event()
+    release = threading.Event()
+
+    def blocking_warmup(self):
+        warming.set()
+        release.wait(timeout=10)
+        return 0.0
+
+    monkeypatch.setattr(gliner_service.GliNERService, "artifact_manifest", lambda self: None)
+    monkeypatch.setattr(gliner_service.GliNERService, "_load_torch_model", lambda self: _Model())
+    monkeypatch.setattr(gliner_service.GliNERService, "_apply_precision", lambda self: None)
+    monkeypatch.setattr(gliner_service.GliNERService, "_ensure_nltk_data", lambda self: None)
+    monkeypatch.setattr(gliner_service.GliNERService, "warmup", blocking_warmup)
+    monkeypatch.setattr(gliner_service, "AutoTokenizer", _Tokenizer)
+
+    registry = GlinerModelRegistry()
+    monkeypatch.setattr(gliner_registry, "_registry", registry)
+    client = TestClient(app)
+
+    try:
+        assert registry.load_in_background()
+        assert warming.wait(timeout=10)
+        assert registry._service.warmup_enabled
+
+        response = client.get("/readyz")
+        assert response.status_code == 503
+        assert response.json()["state"] == "loading"
+        assert registry.peek() is None
+        assert not registry.is_loaded()
+    finally:
+        release.set()
+
+    registry._background_load.join(timeout=10)
+    response = client.get("/readyz")
+    assert response.status_code == 200
+    assert response.json() == {"ready": True, "state": "loaded"}
@@ -12,6 +12,9 @@ import './App.css';
 
 const API_BASE_URL = process.env.REACT_APP_BACKEND_BASE_URL || 'http://localhost:8080';
 const PROLIFIC_STORAGE_KEY = 'whatsapp_prolific_id';
+// Backoff for /pii/status nudges while waiting for the GLiNER model.
+const PII_STATUS_RETRY_INITIAL_MS = 1500;
+const PII_STATUS_RETRY_MAX_MS = 15000;
 
 function isMobileDevice() {
   const ua = navigator.userAgent || '';
@@ -193,6 +196,10 @@ function App() {
   const [initialized, setInitialized] = useState(false);
   const [piiReady, setPiiReady] = useState(true);
   const [initialPiiDelayDone, setInitialPiiDelayDone] = useState(false);
+  // Latest readiness pushed over /pii/events (null until the first event),
+  // plus callers of waitForPiiReady waiting for the next "warm" event.
+  const piiEventStateRef = useRef(null);
+  const piiReadyWaitersRef = useRef([]);
 
   const initializeParticipant = useCallback(async () => {
     let lastError = null;
@@ -271,6 +278,34 @@ function App() {
     if (variant !== 'A') {
       return true;
     }
+    if (typeof EventSource !== 'undefined') {
+      if (piiEventStateRef.current === true) {
+        return true;
+      }
+      // Wait for the next "warm" event, but keep nudging /pii/status with
+      // backoff: it starts a new load after an idle unload or a failed load
+      // (nothing else does), and answers directly if the event stream is down.
+      let waiter = null;
+      const warm = new Promise((resolve) => {
+        waiter = resolve;
+        piiReadyWaitersRef.current.push(resolve);
+      });
+      let delayMs = PII_STATUS_RETRY_INITIAL_MS;
+      try {
+        while (true) {
+          if (await checkPiiStatus()) {
+            return true;
+          }
+          const ready = await Promise.race([warm, sleep(delayMs).then(() => false)]);
+          if (ready) {
+            return true;
+          }
+          delayMs = Math.min(delayMs * 2, PII_STATUS_RETRY_MAX_MS);
+        }
+      } finally {
+        piiReadyWaitersRef.current = piiReadyWaitersRef.current.filter((resolve) => resolve !== waiter);
+      }
+    }
 
     while (true) {
       const loaded = await checkPiiStatus();
@@ -303,12 +338,41 @@ function App() {
     if (isAdminRoute) {
       return undefined;
     }
-    if (variant === 'A') {
+    if (variant !== 'A') {
+      return undefined;
+    }
+    if (typeof EventSource === 'undefined') {
       checkPiiStatus();
       const interval = setInterval(checkPiiStatus, 3000);
       return () => clearInterval(interval);
     }
-    return undefined;
+
+    // The backend pushes model lifecycle events (and starts loading the model
+    // on subscribe); EventSource reconnects by itself if the stream drops.
+    const source = new EventSource(`${API_BASE_URL}/pii/events`);
+    const handleLifecycleEvent = (event) => {
+      let data;
+      try {
+        data = JSON.parse(event.data);
+      } catch (error) {
+        return;
+      }
+      const loaded = Boolean(data?.loaded);
+      piiEventStateRef.current = loaded;
+      setPiiReady(loaded);
+      if (loaded) {
+        const waiters = piiReadyWaitersRef.current;
+        piiReadyWaitersRef.current = [];
+        waiters.forEach((resolve) => resolve(true));
+      }
+    };
+    ['loading', 'progress', 'warm', 'unloaded', 'failed'].forEach((name) => {
+      source.addEventListener(name, handleLifecycleEvent);
+    });
+    return () => {
+      source.close();
+      piiEventStateRef.current = null;
+    };
   }, [variant, isAdminRoute, checkPiiStatus]);
 
   useEffect(() => {
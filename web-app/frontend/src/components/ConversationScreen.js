@@ -10,6 +10,10 @@ import { getRedirectPathFrom409 } from '../utils/apiErrors';
 
 const API_BASE_URL = process.env.REACT_APP_BACKEND_BASE_URL || 'http://localhost:8080';
 const DEFAULT_PII_DEBOUNCE_MS = 400;
+const PII_STREAM_URL = `${API_BASE_URL.replace(/^http/, 'ws')}/pii/stream`;
+// After a failed stream connect, drafts use HTTP for this long (doubling per failure).
+const PII_STREAM_RETRY_INITIAL_MS = 2000;
+const PII_STREAM_RETRY_MAX_MS = 60000;
 
 function ConversationScreen({ conversation, participantId, participantProlificId, variant, onComplete, conversationIndex }) {
   const navigate = useNavigate();
@@ -27,6 +31,8 @@ function ConversationScreen({ conversation, participantId, participantProlificId
   const [lastMaskedText, setLastMaskedText] = useState(null);
   const [lastRawText, setLastRawText] = useState(null);
   const [lastHasPii, setLastHasPii] = useState(false);
+  // Label profile that produced lastMaskedText; only 'full' results may feed risk assessment.
+  const [lastPiiProfile, setLastPiiProfile] = useState(null);
   const [lastAssessedText, setLastAssessedText] = useState('');
   const [isSending, setIsSending] = useState(false);
   const [maskedHistory, setMaskedHistory] = useState(null);
@@ -47,6 +53,13 @@ function ConversationScreen({ conversation, participantId, participantProlificId
   const pendingAbortMarkerRef = useRef(false);
   const pendingRiskOutputIdRef = useRef(null);
   const activeAlertInteractionRef = useRef(null);
+  // Live PII stream: the span map mirrors what the server last pushed on this socket.
+  const piiSocketRef = useRef(null);
+  const piiStreamSpansRef = useRef(new Map());
+  const piiStreamTextRef = useRef({ revision: null, text: '' });
+  const piiStreamHandlerRef = useRef(null);
+  const piiStreamRetryRef = useRef({ delayMs: 0, nextAttemptAt: 0 });
+  const piiStreamBusyTimeoutRef = useRef(null);
 
   const instructionSets = [
     {
@@ -137,24 +150,37 @@ function ConversationScreen({ conversation, participantId, participantProlificId
       };
     }
 
-    const separator = '\n<<<MSG_SEPARATOR>>>\n';
-    const serializedHistory = historyForMasking.map((m) => m.text || '').join(separator);
-    axios.post(
-      `${API_BASE_URL}/pii/detect`,
-      { draft_text: serializedHistory },
+    const toMaskedTexts = (items, field) => (
+      Array.isArray(items) && items.length === historyForMasking.length
+        ? items.map((item, idx) => (typeof item?.[field] === 'string' ? item[field] : historyForMasking[idx].text))
+        : null
+    );
+    const maskViaBatch = () => axios.post(
+      `${API_BASE_URL}/pii/detect-batch`,
+      { texts: historyForMasking.map((m) => m.text || '') },
       { timeout: 30000 }
-    )
-      .then((response) => {
+    ).then((response) => toMaskedTexts(response.data?.items, 'masked_text'));
+    // Seed conversations are masked once on the server; fall back to batch masking.
+    const precomputed = conversation.conversation_id != null
+      ? axios.get(
+        `${API_BASE_URL}/pii/masked-history/${conversation.conversation_id}`,
+        { timeout: 30000 }
+      )
+        .then((response) => toMaskedTexts(response.data?.messages, 'text'))
+        .catch(() => null)
+      : Promise.resolve(null);
+
+    precomputed
+      .then((maskedTexts) => maskedTexts || maskViaBatch())
+      .then((maskedTexts) => {
         if (cancelled) return;
-        const maskedText = response.data?.masked_text;
-        if (!maskedText) {
+        if (!maskedTexts) {
           setMaskedHistory(historyForMasking);
           return;
         }
-        const maskedParts = maskedText.split(separator);
         const rebuiltHistory = historyForMasking.map((m, idx) => ({
           ...m,
-          text: maskedParts[idx] !== undefined ? maskedParts[idx] : m.text
+          text: maskedTexts[idx]
         }));
         setMaskedHistory(rebuiltHistory);
       })
@@ -182,6 +208,10 @@ function ConversationScreen({ conversation, participantId, participantProlificId
       clearTimeout(typingTimeoutRef.current);
       typingTimeoutRef.current = null;
     }
+    if (piiStreamBusyTimeoutRef.current) {
+      clearTimeout(piiStreamBusyTimeoutRef.current);
+      piiStreamBusyTimeoutRef.current = null;
+    }
   };
 
   const abortActiveAssessRequests = () => {
@@ -297,6 +327,116 @@ function ConversationScreen({ conversation, participantId, participantProlificId
     return `output-${Date.now()}-${Math.random().toString(36).slice(2, 10)}`;
   };
 
+  const applyLivePiiResult = (textToUse, spans, masked) => {
+    const hasPii = spans.length > 0;
+    setPiiSpans(spans);
+    setLastRawText(textToUse);
+    setLastMaskedText(masked);
+    setLastHasPii(hasPii);
+    setLastPiiProfile('typing');
+
+    if (!hasPii) {
+      setWarningState(null);
+      setLastRiskAnalysis(null);
+      setLastOfferedRewrite(null);
+      setLastShownRewrite(null);
+      setLastAssessedText(textToUse);
+      setRiskPending(false);
+      setIsWarningOpen(false);
+    }
+  };
+
+  const applyLivePiiFailure = (textToUse) => {
+    setPiiSpans([]);
+    setLastRawText(textToUse);
+    setLastMaskedText(null);
+    setLastHasPii(false);
+    setWarningState(null);
+    setLastRiskAnalysis(null);
+    setLastOfferedRewrite(null);
+    setLastShownRewrite(null);
+    setLastAssessedText(textToUse);
+    setRiskPending(false);
+    setIsWarningOpen(false);
+  };
+
+  const handlePiiStreamMessage = (event) => {
+    let message;
+    try {
+      message = JSON.parse(event.data);
+    } catch (_) {
+      return;
+    }
+    const spanKey = (span) => `${span.start}:${span.end}:${span.label}`;
+    if (message.type === 'spans') {
+      // Deltas are relative to the previous push, so apply them even for stale revisions.
+      const spanMap = piiStreamSpansRef.current;
+      (message.removed || []).forEach((span) => spanMap.delete(spanKey(span)));
+      (message.added || []).forEach((span) => spanMap.set(spanKey(span), span));
+    }
+    const { revision, text } = piiStreamTextRef.current;
+    if (message.revision !== revision || revision !== livePipelineVersionRef.current) {
+      return;
+    }
+    if (message.type === 'spans') {
+      const spans = Array.from(piiStreamSpansRef.current.values()).sort((a, b) => a.start - b.start);
+      if (message.stage === 'model') {
+        applyLivePiiResult(text, spans, null);
+      } else {
+        setPiiSpans(spans);
+      }
+    } else if (message.type === 'busy') {
+      // Keep the spans already shown and ask again once the server has room.
+      if (piiStreamBusyTimeoutRef.current) {
+        clearTimeout(piiStreamBusyTimeoutRef.current);
+      }
+      piiStreamBusyTimeoutRef.current = setTimeout(() => {
+        piiStreamBusyTimeoutRef.current = null;
+        runLivePiiStage(revision, text);
+      }, Math.max(1, message.retry_after || 1) * 1000);
+    } else {
+      console.error('[RISK] PII detection failed in live stream:', message.detail || message.type);
+      applyLivePiiFailure(text);
+    }
+  };
+  piiStreamHandlerRef.current = handlePiiStreamMessage;
+
+  const ensurePiiSocket = () => {
+    if (typeof WebSocket === 'undefined') {
+      return null;
+    }
+    const existing = piiSocketRef.current;
+    if (existing && (existing.readyState === WebSocket.CONNECTING || existing.readyState === WebSocket.OPEN)) {
+      return existing;
+    }
+    // Hold the HTTP fallback after a failed connect instead of reconnecting on every keystroke.
+    if (Date.now() < piiStreamRetryRef.current.nextAttemptAt) {
+      return null;
+    }
+    const socket = new WebSocket(PII_STREAM_URL);
+    let opened = false;
+    piiStreamSpansRef.current = new Map();
+    socket.onopen = () => {
+      opened = true;
+      piiStreamRetryRef.current = { delayMs: 0, nextAttemptAt: 0 };
+    };
+    socket.onmessage = (event) => piiStreamHandlerRef.current?.(event);
+    socket.onclose = () => {
+      if (piiSocketRef.current === socket) {
+        piiSocketRef.current = null;
+      }
+      if (!opened) {
+        const { delayMs } = piiStreamRetryRef.current;
+        const nextDelayMs = delayMs
+          ? Math.min(delayMs * 2, PII_STREAM_RETRY_MAX_MS)
+          : PII_STREAM_RETRY_INITIAL_MS;
+        piiStreamRetryRef.current = { delayMs: nextDelayMs, nextAttemptAt: Date.now() + nextDelayMs };
+      }
+    };
+    piiSocketRef.current = socket;
+    return socket;
+  };
+
   const runLivePiiStage = async (pipelineVersion, textToUse) => {
     if (pipelineVersion !== livePipelineVersionRef.current) {
       return;
@@ -310,39 +450,62 @@ function ConversationScreen({ conversation, participantId, participantProlificId
       return;
     }
 
+    // Prefer the stream: the server detects only the newest revision and pushes span deltas.
+    const socket = ensurePiiSocket();
+    if (socket && socket.readyState === WebSocket.OPEN) {
+      piiStreamTextRef.current = { revision: pipelineVersion, text: textToUse };
+      socket.send(JSON.stringify({
+        revision: pipelineVersion,
+        draft_text: textToUse,
+        mode: 'incremental',
+        profile: 'typing',
+        detector: 'hybrid',
+        conversation_id: conversation.conversation_id ?? null
+      }));
+      return;
+    }
+
     let piiController = null;
+    let modelSettled = false;
     try {
       piiController = new AbortController();
       assessAbortControllersRef.current.pii = piiController;
+      // Rule-based spans need no model call; underline them while GLiNER runs.
+      axios.post(
+        `${API_BASE_URL}/pii/detect`,
+        { draft_text: textToUse, detector: 'fast', conversation_id: conversation.conversation_id ?? null },
+        { timeout: 5000, signal: piiController.signal }
+      ).then((fastResponse) => {
+        if (!modelSettled && pipelineVersion === livePipelineVersionRef.current) {
+          setPiiSpans(fastResponse.data?.pii_spans || []);
+        }
+      }).catch(() => {});
       const piiResponse = await axios.post(
         `${API_BASE_URL}/pii/detect`,
-        { draft_text: textToUse },
+        {
+          draft_text: textToUse,
+          mode: 'incremental',
+          profile: 'typing',
+          detector: 'hybrid',
+          conversation_id: conversation.conversation_id ?? null,
+          participant_id: participantId || null,
+          session_id: conversationIndex + 1,
+          purpose: 'typing'
+        },
         { timeout: 30000, signal: piiController.signal }
       );
-      if (pipelineVersion !== livePipelineVersionRef.current) {
+      modelSettled = true;
+      if (pipelineVersion !== livePipelineVersionRef.current || piiResponse.data?.superseded) {
         return;
       }
 
-      const spans = piiResponse.data?.pii_spans || [];
-      const masked = piiResponse.data?.masked_text || null;
-      const hasPii = spans.length > 0;
-
-      setPiiSpans(spans);
-      setLastRawText(textToUse);
-      setLastMaskedText(masked);
-      setLastHasPii(hasPii);
-
-      if (!hasPii) {
-        setWarningState(null);
-        setLastRiskAnalysis(null);
-        setLastOfferedRewrite(null);
-        setLastShownRewrite(null);
-        setLastAssessedText(textToUse);
-        setRiskPending(false);
-        setIsWarningOpen(false);
-        return;
-      }
+      applyLivePiiResult(
+        textToUse,
+        piiResponse.data?.pii_spans || [],
+        piiResponse.data?.masked_text || null
+      );
     } catch (error) {
+      modelSettled = true;
       if (isCanceledRequest(error)) {
         return;
       }
@@ -350,17 +513,7 @@ function ConversationScreen({ conversation, participantId, participantProlificId
         return;
       }
       console.error('[RISK] PII detection failed in live stage:', error);
-      setPiiSpans([]);
-      setLastRawText(textToUse);
-      setLastMaskedText(null);
-      setLastHasPii(false);
-      setWarningState(null);
-      setLastRiskAnalysis(null);
-      setLastOfferedRewrite(null);
-      setLastShownRewrite(null);
-      setLastAssessedText(textToUse);
-      setRiskPending(false);
-      setIsWarningOpen(false);
+      applyLivePiiFailure(textToUse);
     } finally {
       if (piiController && assessAbortControllersRef.current.pii === piiController) {
         assessAbortControllersRef.current.pii = null;
@@ -442,7 +595,12 @@ function ConversationScreen({ conversation, participantId, participantProlificId
     }
 
     if (variant === 'A') {
-      if (!forcePiiRefresh && lastRawText && lastRawText.trim() === textToUse) {
+      if (
+        !forcePiiRefresh
+        && lastPiiProfile === 'full'
+        && lastRawText
+        && lastRawText.trim() === textToUse
+      ) {
         maskedToUse = lastMaskedText;
         hasPii = lastHasPii;
       } else {
@@ -451,10 +609,15 @@ function ConversationScreen({ conversation, participantId, participantProlificId
           assessAbortControllersRef.current.pii = piiController;
           const piiResponse = await axios.post(
             `${API_BASE_URL}/pii/detect`,
-            { draft_text: textToUse },
+            {
+              draft_text: textToUse,
+              participant_id: participantId || null,
+              session_id: conversationIndex + 1,
+              purpose: 'analyze'
+            },
             { timeout: 30000, signal: piiController.signal }
           );
-          if (requestId !== riskRequestCounterRef.current) {
+          if (requestId !== riskRequestCounterRef.current || piiResponse.data?.superseded) {
             return null;
           }
           const spans = piiResponse.data?.pii_spans || [];
@@ -464,6 +627,7 @@ function ConversationScreen({ conversation, participantId, participantProlificId
           setLastRawText(textToUse);
           setLastMaskedText(maskedToUse);
           setLastHasPii(hasPii);
+          setLastPiiProfile('full');
         } catch (error) {
           if (isCanceledRequest(error)) {
             return null;
@@ -842,6 +1006,21 @@ function ConversationScreen({ conversation, participantId, participantProlificId
     return () => window.removeEventListener('beforeunload', handler);
   }, []);
 
+  useEffect(() => {
+    if (variant !== 'A') {
+      return undefined;
+    }
+    // Open the live PII stream early so the first debounced draft can use it.
+    ensurePiiSocket();
+    return () => {
+      const socket = piiSocketRef.current;
+      piiSocketRef.current = null;
+      if (socket) {
+        socket.close();
+      }
+    };
+  }, [variant]);
+
   useEffect(() => () => {
     if (submitLoadingDelayRef.current) {
       clearTimeout(submitLoadingDelayRef.current);